@@ -14,7 +14,25 @@ Options:
     --author USER    GitHub username (default: @me)
     --no-deploy      Skip deployment checks (faster)
     --slack          Output Slack-formatted markdown
-    --watch [SECS]   Re-run every SECS seconds (default: 60), notify on changes
+    --watch [SECS]   Re-run every SECS seconds (default: 60), notify on changes;
+                     PRs with CI running or deploys in flight refresh sooner
+    --no-cache       Don't read or write the on-disk PR, API and repo caches
+    --repo-ttl SECS  Reuse repo metadata (default branch, deploy model) for
+                     SECS seconds (default: 21600)
+    --stats          Print API call, latency, cache and phase statistics
+    --metrics-file PATH
+                     Write Prometheus textfile metrics to PATH after each cycle
+    --daemon         Poll in the background and serve the latest snapshot on a
+                     Unix socket; other invocations with the same --author,
+                     --days and --no-deploy read from it instead of GitHub
+    --no-daemon      Query GitHub directly even if a daemon is running
+    --bar [SECS]     Print status-bar JSON (waybar/sketchybar) from the last
+                     saved snapshot without querying GitHub; marked stale when
+                     older than SECS (default: 600)
+    --webhook PORT   With --watch or --daemon, accept GitHub webhook deliveries
+                     on 127.0.0.1:PORT, signed with $PR_STATUS_WEBHOOK_SECRET;
+                     touched PRs refresh at once, and polling slows down
+                     while deliveries keep arriving
     --help           Show this help
 
 Dependencies: python3 (3.8+), gh (GitHub CLI)
@@ -23,114 +41,68 @@ Dependencies: python3 (3.8+), gh (GitHub CLI)
 from __future__ import annotations
 
 import argparse
+import json
 import os
 import signal
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Optional
 
-from .deploy import detect_deploy_status
-from .discover import Repo, build_repo_index, discover_pr_stubs
-from .fetch import enrich_pr
-from .model import DeployState, PR, PRLifecycle
-from .notify import diff_and_notify
-from .render import render
+from . import daemon
+from .cache import EnrichCache, RepoMetaCache, cache_root
+from .cycle import Poller, Snapshot, render_snapshot, run_once
+from .metrics import get_metrics
+from .model import PR
+from .screen import Screen
+from .statusbar import DEFAULT_MAX_AGE, bar_output, load_snapshot, save_snapshot, snapshot_path
+from .transport import ResponseCache, get_transport, response_cache_root
+from .webhook import SECRET_ENV, WebhookReceiver
 
 DIM = "\033[2m"
 NC = "\033[0m"
 RED = "\033[0;31m"
-YELLOW = "\033[0;33m"
-
-
-@dataclass
-class Snapshot:
-    prs: list[PR]
-
-
-def render_snapshot(snapshot: Snapshot, slack: bool) -> list[str]:
-    repos = build_repo_index([pr.repo for pr in snapshot.prs])
-    return render(snapshot.prs, repos, slack)
-
-
-def run_once(
-    author: str,
-    since: str,
-    check_deploy: bool,
-    slack: bool,
-    enrich_cache: dict[tuple[str, int], tuple[str, PR]],
-    quiet: bool = False,
-) -> tuple[Snapshot, list[str]]:
-    """Run one full cycle. Returns (snapshot, output_lines)."""
-    def log(msg: str) -> None:
-        if not quiet:
-            print(msg, file=sys.stderr)
-
-    t0 = time.monotonic()
-    log(f"{DIM}Searching GitHub for relevant PRs...{NC}")
-    pr_stubs = discover_pr_stubs(author, since)
-
-    all_prs: list[PR] = []
-    pending: list[dict] = []
-    for pr_stub in pr_stubs:
-        key = (pr_stub["_repo"], pr_stub["number"])
-        cached = enrich_cache.get(key)
-        if cached and cached[0] == pr_stub.get("updatedAt", ""):
-            pr = cached[1]
-            pr.sources = list(pr_stub.get("_sources") or [])
-            all_prs.append(pr)
-        else:
-            pending.append(pr_stub)
-
-    if pending:
-        log(f"{DIM}Fetching PR details for {len(pending)} PRs...{NC}")
-        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as pool:
-            futures = {pool.submit(enrich_pr, pr_stub): pr_stub for pr_stub in pending}
-            for f in as_completed(futures):
-                pr_stub = futures[f]
-                pr = f.result()
-                if not pr:
-                    continue
-                all_prs.append(pr)
-                enrich_cache[(pr.repo, pr.number)] = (pr_stub.get("updatedAt", ""), pr)
-
-    t1 = time.monotonic()
-    repos = build_repo_index([pr.repo for pr in all_prs])
-
-    if not check_deploy:
-        for pr in all_prs:
-            if pr.lifecycle == PRLifecycle.MERGED:
-                pr.deploy = DeployState.MERGED
-    elif repos:
-        log(f"{DIM}Checking deployment status...{NC}")
-        repo_prs: dict[str, list[PR]] = {}
-        for pr in all_prs:
-            if "authored_merged" in set(pr.sources):
-                repo_prs.setdefault(pr.repo, []).append(pr)
-
-        deploy_repos = [repo for repo in repos if repo_prs.get(repo.owner_repo)]
-        if deploy_repos:
-            with ThreadPoolExecutor(max_workers=min(8, len(deploy_repos))) as pool:
-                futures = {
-                    pool.submit(detect_deploy_status, repo, repo_prs[repo.owner_repo]): repo
-                    for repo in deploy_repos
-                }
-                for f in as_completed(futures):
-                    repo = futures[f]
-                    deploy_info, warnings = f.result()
-                    for pr in repo_prs.get(repo.owner_repo, []):
-                        if pr.number in deploy_info:
-                            pr.deploy = deploy_info[pr.number]
-                    for w in warnings:
-                        log(f"{YELLOW}  ⚠ {repo.owner_repo}: {w}{NC}")
-
-    t2 = time.monotonic()
-    log(f"{DIM}Done (discover: {t1 - t0:.0f}s, deploy: {t2 - t1:.0f}s){NC}")
-
-    snapshot = Snapshot(prs=all_prs)
-    return snapshot, render_snapshot(snapshot, slack)
+
+
+def serve_daemon(
+    poller: Poller,
+    config: dict,
+    metrics_file: Optional[Path] = None,
+    stats: bool = False,
+) -> None:
+    """Poll and serve snapshots until interrupted. The daemon is what talks
+    to GitHub, so metrics are written (and with `stats` summarized on stderr)
+    after every cycle that produced a new snapshot."""
+    server = daemon.DaemonServer(daemon.socket_path(), config)
+    try:
+        server.start()
+    except RuntimeError as e:
+        print(f"{RED}Error: {e}{NC}", file=sys.stderr)
+        sys.exit(1)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"{DIM}Serving on {server.path}{NC}", file=sys.stderr)
+    published: Optional[Snapshot] = None
+    try:
+        while True:
+            try:
+                poller.step()
+            except Exception as e:
+                print(f"{RED}Error: {e}{NC}", file=sys.stderr)
+                poller.failed()
+            if poller.snapshot and poller.snapshot is not published:
+                server.publish(poller.snapshot.prs)
+                published = poller.snapshot
+                if metrics_file:
+                    get_metrics().write_textfile(metrics_file)
+                if stats:
+                    for line in get_metrics().summary():
+                        print(f"{DIM}{line}{NC}", file=sys.stderr)
+            poller.sleep()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
 
 
 def main() -> None:
@@ -143,6 +115,14 @@ def main() -> None:
     parser.add_argument("--no-deploy", dest="deploy", action="store_false", default=True)
     parser.add_argument("--slack", action="store_true")
     parser.add_argument("--watch", nargs="?", const=60, type=int, metavar="SECS")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", default=True)
+    parser.add_argument("--repo-ttl", type=int, default=6 * 3600, metavar="SECS")
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--metrics-file", type=Path, metavar="PATH")
+    parser.add_argument("--daemon", action="store_true")
+    parser.add_argument("--no-daemon", dest="use_daemon", action="store_false", default=True)
+    parser.add_argument("--bar", nargs="?", const=DEFAULT_MAX_AGE, type=int, metavar="SECS")
+    parser.add_argument("--webhook", type=int, metavar="PORT")
     parser.add_argument("--help", "-h", action="store_true")
 
     args = parser.parse_args()
@@ -150,20 +130,54 @@ def main() -> None:
     if args.help:
         print(__doc__.strip())
         return
+    if args.bar is not None:
+        print(json.dumps(bar_output(load_snapshot(), max_age=args.bar), ensure_ascii=False))
+        return
+
+    receiver: Optional[WebhookReceiver] = None
+    if args.webhook is not None:
+        if args.watch is None and not args.daemon:
+            parser.error("--webhook needs --watch or --daemon")
+        secret = os.environ.get(SECRET_ENV)
+        if not secret:
+            parser.error(f"--webhook needs the shared secret in ${SECRET_ENV}")
+        try:
+            receiver = WebhookReceiver(secret.encode(), args.webhook)
+        except OSError as e:
+            parser.error(f"--webhook: can't listen on port {args.webhook}: {e.strerror or e}")
+        receiver.start()
 
     since = (datetime.now(timezone.utc) - timedelta(days=args.days)).strftime(
         "%Y-%m-%dT%H:%M:%SZ"
     )
 
     enrich_cache: dict[tuple[str, int], tuple[str, PR]] = {}
+    disk_cache: Optional[EnrichCache] = None
+    repo_meta = RepoMetaCache(
+        cache_root() / "repos.json" if args.cache else None, ttl=args.repo_ttl,
+    )
+    if args.cache:
+        disk_cache = EnrichCache()
+        disk_cache.prune()
+        ResponseCache(response_cache_root()).prune()
+    else:
+        transport = get_transport()
+        if transport:
+            transport.cache = ResponseCache()  # in-memory revalidation only
+
+    screen = Screen()
+    if args.watch is not None:
+        # Warnings and errors printed between frames shift the terminal
+        sys.stderr = screen.guard(sys.stderr)
 
     def draw(lines: list[str]) -> None:
-        if args.watch is not None:
-            # Move cursor home and clear below (avoids full terminal flash)
-            sys.stdout.write("\033[H\033[J")
-            sys.stdout.flush()
-        for line in lines:
-            print(line)
+        if args.watch is None:
+            for line in lines:
+                print(line)
+            return
+        if resized:
+            screen.invalidate()  # the terminal reflowed the old frame
+        get_metrics().inc("pr_status_terminal_bytes_total", screen.draw(lines))
 
     resized = False
 
@@ -174,50 +188,95 @@ def main() -> None:
     if hasattr(signal, "SIGWINCH"):
         signal.signal(signal.SIGWINCH, on_resize)
 
-    if args.watch is None:
-        snapshot, lines = run_once(args.author, since, args.deploy, args.slack, enrich_cache)
+    def with_stats(lines: list[str]) -> list[str]:
+        """Write the metrics file and, with --stats, add the summary."""
+        metrics = get_metrics()
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+        if not args.stats:
+            return lines
+        return lines + [""] + [f"{DIM}{line}{NC}" for line in metrics.summary()]
+
+    config = {"author": args.author, "days": args.days, "deploy": args.deploy}
+    snapshot_file = snapshot_path() if args.cache else None
+    use_daemon = args.use_daemon and not args.daemon and receiver is None
+
+    if args.daemon:
+        poller = Poller(
+            args.author, since, args.deploy, False, args.watch or 60, enrich_cache,
+            disk_cache, repo_meta, snapshot_file, receiver,
+        )
+        serve_daemon(poller, config, args.metrics_file, args.stats)
+    elif args.watch is None:
+        served = daemon.fetch_snapshot(config) if use_daemon else None
+        if served:
+            snapshot = Snapshot(prs=served[1] or [])
+            lines = render_snapshot(snapshot, args.slack)
+        else:
+            snapshot, lines = run_once(
+                args.author, since, args.deploy, args.slack, enrich_cache,
+                disk_cache=disk_cache, repo_meta=repo_meta,
+            )
+            if snapshot_file:
+                save_snapshot(snapshot.prs, snapshot_file)
         if not snapshot.prs:
             print("No PRs found.", file=sys.stderr)
             sys.exit(1)
         draw(lines)
+        for line in with_stats([]):
+            print(line, file=sys.stderr)
+    elif use_daemon and (daemon.query({"cmd": "ping", **config}) or {}).get("ok"):
+        # Follow the daemon: it polls and notifies, this pane only redraws
+        generation = 0
+        served_snapshot: Optional[Snapshot] = None
+        while True:
+            try:
+                served = daemon.fetch_snapshot(config, generation)
+                if served is None:
+                    draw([f"{DIM}Waiting for the pr-status daemon...{NC}"])
+                elif served[1] is not None or resized:
+                    generation = served[0]
+                    if served[1] is not None:
+                        served_snapshot = Snapshot(prs=served[1])
+                    if served_snapshot:
+                        draw(render_snapshot(served_snapshot, args.slack))
+                    resized = False
+                time.sleep(1)
+            except KeyboardInterrupt:
+                break
     else:
-        prev: Optional[Snapshot] = None
-        current_snapshot: Optional[Snapshot] = None
-        current_lines: list[str] = []
+        poller = Poller(
+            args.author, since, args.deploy, args.slack, args.watch, enrich_cache,
+            disk_cache, repo_meta, snapshot_file, receiver,
+        )
+
+        def redraw_if_resized() -> None:
+            nonlocal resized
+            if resized and poller.snapshot:
+                draw(with_stats(render_snapshot(poller.snapshot, args.slack)))
+                resized = False
+
         while True:
             try:
-                current_snapshot, current_lines = run_once(
-                    args.author, since, args.deploy, args.slack, enrich_cache,
-                    quiet=True,
-                )
+                current_lines = poller.step()
+                if current_lines:
+                    current_lines = with_stats(current_lines)
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 print(f"{RED}Error: {e}{NC}", file=sys.stderr)
-                current_snapshot, current_lines = None, []
+                poller.failed()
+                current_lines = []
 
             if current_lines:
                 draw(current_lines)
-            elif current_snapshot and not current_snapshot.prs:
+                resized = False
+            elif poller.snapshot and not poller.snapshot.prs:
                 draw([f"\033[2mNo PRs found. Waiting {args.watch}s before retrying...\033[0m"])
-            resized = False
-
-            if prev and current_snapshot:
-                diff_and_notify(prev.prs, current_snapshot.prs)
-            if current_snapshot:
-                prev = current_snapshot
+                resized = False
 
             try:
-                deadline = time.monotonic() + args.watch
-                while True:
-                    remaining = deadline - time.monotonic()
-                    if remaining <= 0:
-                        break
-                    if resized and current_snapshot:
-                        current_lines = render_snapshot(current_snapshot, args.slack)
-                        draw(current_lines)
-                        resized = False
-                    time.sleep(min(0.2, remaining))
+                poller.sleep(redraw_if_resized)
             except KeyboardInterrupt:
                 break
 
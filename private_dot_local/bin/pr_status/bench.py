@@ -0,0 +1,183 @@
+"""Micro-benchmarks for the parse/derive/render/diff hot paths.
+
+Run with:
+    python -m pr_status.bench [--sizes 100,1000,10000] [--widths 40,80,120,200]
+
+PRs are synthetic but shaped like real `gh pr view --json` payloads: dozens of
+reviews and review requests, large statusCheckRollup arrays and long comment
+threads. Each phase reports the best of --repeat runs as wall time, PRs/s and
+peak traced memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator
+
+from . import notify
+from .discover import build_repo_index
+from .model import CIState, DeployState, PRLifecycle, derive_display_state, parse_pr
+from .render import render
+
+LOGINS = [f"dev{i:02d}" for i in range(40)] + ["dependabot[bot]", "coderabbitai", "codecov"]
+CHECKS = [f"{suite} / {job}" for suite in ("ci", "lint", "e2e", "deploy") for job in range(12)]
+WORDS = "fix add refactor bump drop support handle retry cache parser queue flaky auth".split()
+STATES = ["OPEN"] * 6 + ["MERGED"] * 3 + ["CLOSED"]
+REVIEW_STATES = ["COMMENTED"] * 4 + ["APPROVED"] * 2 + ["CHANGES_REQUESTED", "DISMISSED"]
+
+
+def _ts(base: datetime, minutes: int) -> str:
+    return (base + timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_raw_pr(number: int, rng: random.Random) -> tuple[str, dict]:
+    """One synthetic (repo, raw PR) pair in the shape parse_pr expects."""
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=rng.randrange(24 * 30))
+    author = rng.choice(LOGINS[:40])
+    state = rng.choice(STATES)
+    ticket = f"ENG-{rng.randrange(1, 5000)}" if rng.random() < 0.8 else ""
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3, 12)))
+
+    reviews = [
+        {"author": {"login": rng.choice(LOGINS)}, "state": rng.choice(REVIEW_STATES),
+         "submittedAt": _ts(base, 10 + i)}
+        for i in range(rng.randrange(0, 40))
+    ]
+    requests = [{"login": login} for login in rng.sample(LOGINS[:40], rng.randrange(0, 6))]
+    comments = [
+        {"author": {"login": rng.choice(LOGINS)}, "createdAt": _ts(base, 5 + i)}
+        for i in range(rng.randrange(0, 100))
+    ]
+    checks = []
+    for name in rng.sample(CHECKS, rng.randrange(0, len(CHECKS))):
+        roll = rng.random()
+        if roll < 0.05:
+            checks.append({"name": name, "conclusion": "FAILURE", "status": "COMPLETED"})
+        elif roll < 0.15:
+            checks.append({"name": name, "conclusion": None, "status": "IN_PROGRESS"})
+        else:
+            checks.append({"name": name, "conclusion": "SUCCESS", "status": "COMPLETED"})
+
+    repo = f"acme/service-{rng.randrange(30)}"
+    raw = {
+        "number": number,
+        "title": f"{ticket}: {title}" if ticket else title,
+        "state": state,
+        "isDraft": state == "OPEN" and rng.random() < 0.15,
+        "createdAt": _ts(base, 0),
+        "updatedAt": _ts(base, 200),
+        "mergedAt": _ts(base, 180) if state == "MERGED" else None,
+        "mergeCommit": {"oid": f"{number:040x}"} if state == "MERGED" else None,
+        "headRefName": f"{author}/{ticket or number}",
+        "baseRefName": "main",
+        "author": {"login": author},
+        "reviews": reviews,
+        "reviewRequests": requests,
+        "comments": comments,
+        "statusCheckRollup": checks,
+        "reviewDecision": rng.choice(["APPROVED", "CHANGES_REQUESTED", "REVIEW_REQUIRED", ""]),
+        "mergeStateStatus": rng.choice(["CLEAN", "BLOCKED", "BEHIND", "UNSTABLE", "DIRTY"]),
+        "mergeable": rng.choice(["MERGEABLE", "MERGEABLE", "CONFLICTING", "UNKNOWN"]),
+        "url": f"https://github.com/{repo}/pull/{number}",
+    }
+    return repo, raw
+
+
+def make_fixture(n: int, seed: int = 0) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    return [make_raw_pr(i + 1, rng) for i in range(n)]
+
+
+def _sources(raw: dict, rng: random.Random) -> list[str]:
+    if raw["state"] == "MERGED":
+        return ["authored_merged"]
+    return ["review_requested"] if rng.random() < 0.3 else ["authored_open"]
+
+
+@contextmanager
+def _notifications_off() -> Iterator[list[str]]:
+    sent: list[str] = []
+    real = notify.send_notification
+    notify.send_notification = lambda title, message: sent.append(message)
+    try:
+        yield sent
+    finally:
+        notify.send_notification = real
+
+
+def measure(fn: Callable[[], object], repeat: int) -> tuple[float, int]:
+    """(best wall seconds, peak traced bytes) over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def bench_size(n: int, widths: list[int], repeat: int) -> list[tuple[str, float, int]]:
+    fixture = make_fixture(n)
+    rng = random.Random(n)
+    sources = [_sources(raw, rng) for _, raw in fixture]
+    prs = [parse_pr(raw, repo, src) for (repo, raw), src in zip(fixture, sources)]
+    for pr in prs:
+        if pr.lifecycle == PRLifecycle.MERGED:
+            pr.deploy = rng.choice(list(DeployState))
+    repos = build_repo_index(sorted({pr.repo for pr in prs}))
+
+    # A following snapshot where about a tenth of the PRs moved on
+    changed = [
+        replace(pr, ci=CIState.FAIL, ci_failed=["ci / 1"], has_conflicts=not pr.has_conflicts)
+        if i % 10 == 0 else pr
+        for i, pr in enumerate(prs)
+    ]
+
+    phases: list[tuple[str, Callable[[], object]]] = [
+        ("parse_pr", lambda: [parse_pr(raw, repo, src) for (repo, raw), src in zip(fixture, sources)]),
+        ("derive_display_state", lambda: [derive_display_state(pr) for pr in prs]),
+    ]
+    for width in widths:
+        phases.append((f"render (width {width})", lambda w=width: render(prs, repos, False, width=w)))
+    phases.append(("render (slack)", lambda: render(prs, repos, True)))
+    phases.append(("diff_and_notify", lambda: notify.diff_and_notify(prs, changed)))
+
+    results = []
+    with _notifications_off():
+        for name, fn in phases:
+            seconds, peak = measure(fn, repeat)
+            results.append((name, seconds, peak))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m pr_status.bench")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--widths", default="40,80,120,200")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    widths = [int(w) for w in args.widths.split(",") if w]
+
+    print(f"{'phase':<24} {'PRs':>6} {'ms':>10} {'PRs/s':>12} {'peak KiB':>10}")
+    for n in sizes:
+        for name, seconds, peak in bench_size(n, widths, args.repeat):
+            rate = n / seconds if seconds else float("inf")
+            print(f"{name:<24} {n:>6} {seconds * 1000:>10.2f} {rate:>12,.0f} {peak / 1024:>10,.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
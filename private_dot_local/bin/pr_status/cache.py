@@ -0,0 +1,191 @@
+"""Persistent on-disk caches under the XDG cache dir.
+
+Entries are individual JSON files written atomically (temp file + rename), so
+several pr-status instances can share the cache without locking: readers see
+either the old or the new entry, never a partial one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def cache_root() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "pr-status"
+
+
+def read_json(path: Path) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def write_json_atomic(path: Path, data: dict) -> None:
+    """Write JSON via a temp file in the same dir, then rename over `path`."""
+    write_text_atomic(path, json.dumps(data, separators=(",", ":")))
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+class EnrichCache:
+    """Raw enriched PR payloads keyed by (repo, number, updatedAt).
+
+    One file per PR; a newer updatedAt overwrites the older entry. Entries not
+    read or written for `max_age_days` are evicted, and the least recently used
+    ones are dropped once there are more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_entries: int = 2000,
+        max_age_days: float = 45,
+    ) -> None:
+        self.root = root or cache_root() / "enrich"
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+
+    def _path(self, repo: str, number: int) -> Path:
+        digest = hashlib.sha1(f"{repo}#{number}".encode()).hexdigest()
+        return self.root / f"{digest}.json"
+
+    def get(self, repo: str, number: int, updated_at: str) -> Optional[dict]:
+        if not updated_at:
+            return None
+        path = self._path(repo, number)
+        entry = read_json(path)
+        if not entry:
+            return None
+        if (entry.get("repo"), entry.get("number"), entry.get("updatedAt")) != (repo, number, updated_at):
+            return None
+        touch(path)
+        raw = entry.get("raw")
+        return raw if isinstance(raw, dict) else None
+
+    def put(self, repo: str, number: int, updated_at: str, raw: dict) -> None:
+        if not updated_at:
+            return
+        write_json_atomic(
+            self._path(repo, number),
+            {"repo": repo, "number": number, "updatedAt": updated_at, "raw": raw},
+        )
+
+    def prune(self) -> None:
+        """Evict expired entries, then the oldest ones beyond max_entries."""
+        prune_dir(self.root, self.max_entries, self.max_age)
+
+
+def prune_dir(root: Path, max_entries: int, max_age: float) -> None:
+    """Delete *.json files in `root` untouched for `max_age` seconds, then
+    the least recently touched ones beyond `max_entries`."""
+    try:
+        paths = list(root.glob("*.json"))
+    except OSError:
+        return
+    now = time.time()
+    live: list[tuple[float, Path]] = []
+    for path in paths:
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue  # removed by a concurrent prune
+        if now - mtime > max_age:
+            _unlink(path)
+        else:
+            live.append((mtime, path))
+
+    if len(live) > max_entries:
+        live.sort()
+        for _, path in live[: len(live) - max_entries]:
+            _unlink(path)
+
+
+def touch(path: Path) -> None:
+    """Bump a cache file's mtime so LRU eviction keeps it."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+class RepoMetaCache:
+    """Slow-changing per-repo metadata (default branch, branch model, deploy
+    contexts) with a TTL.
+
+    Held in memory and, with `path` set, persisted as one JSON file. save()
+    merges with what other instances wrote since we loaded.
+    """
+
+    def __init__(self, path: Optional[Path] = None, ttl: float = 6 * 3600) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._entries: dict[str, dict] = {}
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        if path is not None:
+            self._entries = _load_entries(path)
+
+    def get(self, owner_repo: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(owner_repo)
+        if not entry or time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return dict(entry)
+
+    def put(self, owner_repo: str, meta: dict, refresh: bool = True) -> None:
+        """Store `meta`; refresh=False updates it without restarting the TTL."""
+        with self._lock:
+            fetched_at = time.time()
+            if not refresh:
+                fetched_at = self._entries.get(owner_repo, {}).get("fetched_at", fetched_at)
+            self._entries[owner_repo] = {**meta, "fetched_at": fetched_at}
+            self._dirty.add(owner_repo)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = _load_entries(self.path)
+            entries.update({k: self._entries[k] for k in self._dirty})
+            self._dirty.clear()
+        write_json_atomic(self.path, {"repos": entries})
+
+
+def _load_entries(path: Path) -> dict[str, dict]:
+    repos = (read_json(path) or {}).get("repos")
+    return repos if isinstance(repos, dict) else {}
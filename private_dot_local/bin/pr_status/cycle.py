@@ -0,0 +1,343 @@
+"""One pr-status cycle and the polling loop built from it.
+
+run_once discovers, enriches and checks deploys for every PR once; Poller
+repeats that for --watch and --daemon, refreshing individual PRs and repos
+between discovery cycles as the scheduler sees fit and notifying on changes.
+Kept out of __main__ so replay and tests can import it.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .cache import EnrichCache, RepoMetaCache
+from .deploy import detect_deploy_statuses
+from .discover import Discovery, Repo, build_repo_index, sort_stubs, stream_pr_stubs
+from .fetch import MAX_BATCH_WORKERS, enrich_batch, enrich_prs, split_batches
+from .governor import get_governor
+from .metrics import get_metrics
+from .model import DeployState, PR, PRLifecycle, parse_pr
+from .notify import StateMark, diff_and_notify, state_marks
+from .render import DIM, NC, YELLOW, render
+from .schedule import Scheduler
+from .statusbar import save_snapshot
+from .webhook import WEBHOOK_SLOWDOWN, Touch, WebhookReceiver
+
+
+@dataclass
+class Snapshot:
+    prs: list[PR]
+    # Taken now: PR objects are shared with later snapshots and updated in place
+    marks: dict[tuple[str, int], StateMark] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.marks = state_marks(self.prs)
+
+
+def render_snapshot(snapshot: Snapshot, slack: bool) -> list[str]:
+    repos = build_repo_index([pr.repo for pr in snapshot.prs])
+    return render(snapshot.prs, repos, slack)
+
+
+def collect_prs(
+    stub_chunks: Iterable[list[dict]],
+    enrich_cache: dict[tuple[str, int], tuple[str, PR]],
+    disk_cache: Optional[EnrichCache],
+    log: Callable[[str], None],
+) -> list[PR]:
+    """Resolve streamed PR stubs to enriched PRs.
+
+    Each chunk is served from the in-memory or on-disk cache where its
+    updatedAt still matches; the rest is submitted for batch enrichment right
+    away, while discovery is still running.
+    """
+    metrics = get_metrics()
+    pr_stubs: list[dict] = []
+    resolved: dict[tuple[str, int], PR] = {}
+    fetched = 0
+    with ThreadPoolExecutor(max_workers=get_governor().pool_size(MAX_BATCH_WORKERS)) as pool:
+        futures = []
+        for chunk in stub_chunks:
+            pending: list[dict] = []
+            for pr_stub in chunk:
+                pr_stubs.append(pr_stub)
+                key = (pr_stub["_repo"], pr_stub["number"])
+                updated_at = pr_stub.get("updatedAt", "")
+                cached = enrich_cache.get(key)
+                if cached and cached[0] == updated_at:
+                    metrics.inc("pr_status_enrich_cache_total", result="memory")
+                    resolved[key] = cached[1]
+                    continue
+                raw = disk_cache.get(*key, updated_at) if disk_cache else None
+                if raw is not None:
+                    metrics.inc("pr_status_enrich_cache_total", result="disk")
+                    resolved[key] = parse_pr(raw, key[0])
+                else:
+                    metrics.inc("pr_status_enrich_cache_total", result="miss")
+                    pending.append(pr_stub)
+            for batch in split_batches(pending):
+                futures.append(pool.submit(enrich_batch, batch, disk_cache))
+            fetched += len(pending)
+        if fetched:
+            log(f"{DIM}Fetching PR details for {fetched} PRs...{NC}")
+        for f in futures:
+            resolved.update(f.result())
+
+    all_prs: list[PR] = []
+    for pr_stub in sort_stubs(pr_stubs):
+        key = (pr_stub["_repo"], pr_stub["number"])
+        pr = resolved.get(key)
+        if not pr:
+            continue
+        # Sources are only final once every bucket has reported
+        pr.sources = list(pr_stub.get("_sources") or [])
+        previous = enrich_cache.get(key)
+        if previous and previous[1] is not pr:
+            pr.deploy = previous[1].deploy  # until the repo is checked again
+        enrich_cache[key] = (pr_stub.get("updatedAt", ""), pr)
+        all_prs.append(pr)
+    return all_prs
+
+
+def run_once(
+    author: str,
+    since: str,
+    check_deploy: bool,
+    slack: bool,
+    enrich_cache: dict[tuple[str, int], tuple[str, PR]],
+    quiet: bool = False,
+    disk_cache: Optional[EnrichCache] = None,
+    discovery: Optional[Discovery] = None,
+    repo_meta: Optional[RepoMetaCache] = None,
+    scheduler: Optional[Scheduler] = None,
+) -> tuple[Snapshot, list[str]]:
+    """Run one full cycle. Returns (snapshot, output_lines).
+
+    With a `discovery`, searches are incremental after its first pass. With a
+    `scheduler`, only repos it considers due get their deploys re-checked.
+    """
+    def log(msg: str) -> None:
+        if not quiet:
+            print(msg, file=sys.stderr)
+
+    t0 = time.monotonic()
+    log(f"{DIM}Searching GitHub for relevant PRs...{NC}")
+    stub_chunks = discovery.stream() if discovery else stream_pr_stubs(author, since)
+    all_prs = collect_prs(stub_chunks, enrich_cache, disk_cache, log)
+
+    t1 = time.monotonic()
+    repos = build_repo_index([pr.repo for pr in all_prs])
+    deploy_repos: list[Repo] = []
+
+    if not check_deploy:
+        for pr in all_prs:
+            if pr.lifecycle == PRLifecycle.MERGED:
+                pr.deploy = DeployState.MERGED
+    elif repos:
+        log(f"{DIM}Checking deployment status...{NC}")
+        repo_prs = merged_prs_by_repo(all_prs)
+        deploy_repos = [repo for repo in repos if repo_prs.get(repo.owner_repo)]
+        if scheduler:
+            deploy_repos = [
+                repo for repo in deploy_repos
+                if scheduler.repo_needs_check(repo.owner_repo, repo_prs[repo.owner_repo])
+            ]
+        update_deploy_states(deploy_repos, repo_prs, repo_meta, log)
+
+    t2 = time.monotonic()
+    log(f"{DIM}Done (discover: {t1 - t0:.0f}s, deploy: {t2 - t1:.0f}s){NC}")
+    metrics = get_metrics()
+    metrics.phase("discover", t1 - t0)
+    metrics.phase("deploy", t2 - t1)
+
+    if scheduler:
+        scheduler.observe(all_prs)
+        scheduler.refreshed([], [repo.owner_repo for repo in deploy_repos], all_prs)
+        scheduler.discovered()
+
+    snapshot = Snapshot(prs=all_prs)
+    lines = render_snapshot(snapshot, slack)
+    metrics.phase("render", time.monotonic() - t2)
+    record_snapshot_metrics(snapshot)
+    # Rate limiting and search caps can drop PRs from the output; say so
+    # instead of hiding it
+    for w in get_governor().take_warnings():
+        if quiet:
+            lines.append(f"{YELLOW}⚠ {w}{NC}")
+        else:
+            log(f"{YELLOW}⚠ {w}{NC}")
+    return snapshot, lines
+
+
+def record_snapshot_metrics(snapshot: Snapshot) -> None:
+    metrics = get_metrics()
+    metrics.clear_gauge("pr_status_prs")
+    counts: dict[str, int] = {}
+    for pr in snapshot.prs:
+        state = pr.display_state.name.lower()
+        counts[state] = counts.get(state, 0) + 1
+    for state, n in counts.items():
+        metrics.set("pr_status_prs", n, state=state)
+
+
+def merged_prs_by_repo(prs: list[PR]) -> dict[str, list[PR]]:
+    repo_prs: dict[str, list[PR]] = {}
+    for pr in prs:
+        if "authored_merged" in set(pr.sources):
+            repo_prs.setdefault(pr.repo, []).append(pr)
+    return repo_prs
+
+
+def update_deploy_states(
+    deploy_repos: list[Repo],
+    repo_prs: dict[str, list[PR]],
+    repo_meta: Optional[RepoMetaCache],
+    log: Callable[[str], None],
+) -> None:
+    if not deploy_repos:
+        return
+    statuses = detect_deploy_statuses(deploy_repos, repo_prs, repo_meta)
+    for repo in deploy_repos:
+        deploy_info, warnings = statuses.get(repo.owner_repo, ({}, []))
+        for pr in repo_prs.get(repo.owner_repo, []):
+            if pr.number in deploy_info:
+                pr.deploy = deploy_info[pr.number]
+        for w in warnings:
+            log(f"{YELLOW}  ⚠ {repo.owner_repo}: {w}{NC}")
+    if repo_meta:
+        repo_meta.save()
+
+
+def refresh_snapshot(
+    snapshot: Snapshot,
+    keys: list[tuple[str, int]],
+    repo_names: list[str],
+    enrich_cache: dict[tuple[str, int], tuple[str, PR]],
+    repo_meta: Optional[RepoMetaCache] = None,
+) -> Snapshot:
+    """Re-fetch the given PRs and re-check deploys for the given repos between
+    discovery cycles. Returns a new snapshot in the same order."""
+    t0 = time.monotonic()
+    by_key = {(pr.repo, pr.number): pr for pr in snapshot.prs}
+    stubs = [
+        {"_repo": repo, "number": number, "_sources": by_key[(repo, number)].sources}
+        for repo, number in keys if (repo, number) in by_key
+    ]
+    for key, pr in enrich_prs(stubs).items():
+        old = by_key[key]
+        pr.sources = old.sources
+        pr.deploy = old.deploy
+        by_key[key] = pr
+        enrich_cache[key] = (pr.updated_at, pr)
+
+    prs = [by_key[(pr.repo, pr.number)] for pr in snapshot.prs]
+    if repo_names:
+        repo_prs = merged_prs_by_repo(prs)
+        deploy_repos = [
+            repo for repo in build_repo_index(repo_names) if repo_prs.get(repo.owner_repo)
+        ]
+        update_deploy_states(deploy_repos, repo_prs, repo_meta, lambda msg: None)
+    get_metrics().phase("refresh", time.monotonic() - t0)
+    return Snapshot(prs=prs)
+
+
+class Poller:
+    """The --watch / --daemon polling cycle: discovery when due, scheduled
+    refreshes in between, notifications on changes."""
+
+    def __init__(
+        self,
+        author: str,
+        since: str,
+        check_deploy: bool,
+        slack: bool,
+        interval: int,
+        enrich_cache: dict[tuple[str, int], tuple[str, PR]],
+        disk_cache: Optional[EnrichCache] = None,
+        repo_meta: Optional[RepoMetaCache] = None,
+        snapshot_file: Optional[Path] = None,
+        receiver: Optional[WebhookReceiver] = None,
+    ) -> None:
+        self.author = author
+        self.since = since
+        self.check_deploy = check_deploy
+        self.slack = slack
+        self.enrich_cache = enrich_cache
+        self.disk_cache = disk_cache
+        self.repo_meta = repo_meta
+        self.snapshot_file = snapshot_file  # saved here for --bar when it changes
+        self.receiver = receiver
+        self.discovery = Discovery(author, since)
+        self.scheduler = Scheduler(interval, track_deploys=check_deploy)
+        self.snapshot: Optional[Snapshot] = None
+        self.prev: Optional[Snapshot] = None
+
+    def step(self) -> list[str]:
+        """One tick. Returns the rendered snapshot if it changed, else []."""
+        lines: list[str] = []
+        if self.receiver:
+            self.push(self.receiver.drain())
+            # While deliveries arrive, polling only reconciles missed ones
+            self.scheduler.set_interval_scale(WEBHOOK_SLOWDOWN if self.receiver.active() else 1)
+        if self.scheduler.discovery_due():
+            self.snapshot, lines = run_once(
+                self.author, self.since, self.check_deploy, self.slack, self.enrich_cache,
+                quiet=True, disk_cache=self.disk_cache, discovery=self.discovery,
+                repo_meta=self.repo_meta, scheduler=self.scheduler,
+            )
+        elif self.snapshot:
+            keys, repo_names = self.scheduler.plan()
+            if keys or repo_names:
+                self.snapshot = refresh_snapshot(
+                    self.snapshot, keys, repo_names, self.enrich_cache, self.repo_meta,
+                )
+                self.scheduler.observe(self.snapshot.prs)
+                self.scheduler.refreshed(keys, repo_names, self.snapshot.prs)
+                lines = render_snapshot(self.snapshot, self.slack)
+
+        if self.snapshot and self.snapshot is not self.prev and self.snapshot_file:
+            save_snapshot(self.snapshot.prs, self.snapshot_file)
+        if self.prev and self.snapshot and self.snapshot is not self.prev:
+            diff_and_notify(self.prev.prs, self.snapshot.prs, self.prev.marks)
+        if self.snapshot:
+            self.prev = self.snapshot
+        return lines
+
+    def push(self, touches: list[Touch]) -> None:
+        """Make what webhook deliveries touched due for a refresh."""
+        if not touches:
+            return
+        prs = self.snapshot.prs if self.snapshot else []
+        keys: list[tuple[str, int]] = []
+        for touch in touches:
+            keys.extend((touch.repo, n) for n in touch.numbers)
+            if touch.all_open:
+                keys.extend(
+                    (pr.repo, pr.number) for pr in prs
+                    if pr.repo == touch.repo and pr.lifecycle in (PRLifecycle.OPEN, PRLifecycle.DRAFT)
+                )
+        self.scheduler.push(
+            list(dict.fromkeys(keys)),
+            list(dict.fromkeys(t.repo for t in touches if t.deploys)),
+            discover=any(t.discover for t in touches),
+        )
+
+    def failed(self) -> None:
+        self.snapshot = None
+        self.scheduler.forget()  # nothing to refresh until discovery succeeds
+        self.scheduler.discovered()  # retry on the base interval
+
+    def sleep(self, on_tick: Optional[Callable[[], None]] = None) -> None:
+        deadline = time.monotonic() + self.scheduler.next_wakeup()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self.receiver and self.receiver.wake.is_set()):
+                break
+            if on_tick:
+                on_tick()
+            time.sleep(min(0.2, remaining))
@@ -0,0 +1,179 @@
+"""Background poller serving the latest snapshot over a Unix socket.
+
+`pr-status --daemon` polls GitHub the way --watch does (discovery, scheduled
+refreshes, notifications) and keeps the latest snapshot in memory. Other
+invocations ask it instead of GitHub: a one-shot `pr-status` and every
+`--watch` pane render from the daemon's snapshot, so GitHub is polled once
+however many clients there are.
+
+The protocol is one JSON request line and one JSON response line per
+connection, for easy use from editor integrations:
+
+    {"cmd": "ping"}
+    {"cmd": "snapshot", "generation": N}
+        -> {"ok": true, "generation": N, "updated": EPOCH, "prs": [...]}
+           ("prs" is left out when the generation is the one asked for)
+    {"cmd": "render", "slack": false, "width": 120}
+        -> {"ok": true, "generation": N, "updated": EPOCH, "lines": [...]}
+
+Requests may carry the "author", "days" and "deploy" they want; a daemon
+polling for something else answers {"ok": false, "error": ...} and the client
+falls back to querying GitHub itself.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .cache import cache_root
+from .discover import build_repo_index
+from .model import PR, pr_from_dict, pr_to_dict
+from .render import render
+
+MAX_REQUEST_BYTES = 64 * 1024
+CONFIG_KEYS = ("author", "days", "deploy")
+
+
+def socket_path() -> Path:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / "pr-status.sock"
+    return cache_root() / "daemon.sock"
+
+
+class DaemonServer:
+    """Holds the published snapshot and answers socket requests about it."""
+
+    def __init__(self, path: Path, config: dict) -> None:
+        self.path = path
+        self.config = config  # author, days, deploy
+        self.generation = 0
+        self.updated = 0.0
+        self._prs: list[PR] = []
+        self._encoded: Optional[list[dict]] = None  # pr_to_dict of _prs, built on first request
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    def publish(self, prs: list[PR]) -> None:
+        with self._lock:
+            self._prs = list(prs)
+            self._encoded = None
+            self.generation += 1
+            self.updated = time.time()
+
+    def handle(self, request: dict) -> dict:
+        for key in CONFIG_KEYS:
+            if key in request and request[key] != self.config[key]:
+                return {"ok": False, "error": f"daemon polls {key}={self.config[key]!r}"}
+        cmd = request.get("cmd")
+        if cmd == "ping":
+            return {"ok": True, **self.config}
+        if cmd not in ("snapshot", "render"):
+            return {"ok": False, "error": f"unknown command {cmd!r}"}
+        width = request.get("width")
+        if cmd == "render" and width is not None and (
+            not isinstance(width, int) or isinstance(width, bool) or width <= 0
+        ):
+            return {"ok": False, "error": "width must be a positive integer"}
+
+        with self._lock:
+            prs, generation, updated = self._prs, self.generation, self.updated
+            if generation == 0:
+                return {"ok": False, "error": "no snapshot yet"}
+            if cmd == "snapshot" and request.get("generation") != generation and self._encoded is None:
+                self._encoded = [pr_to_dict(pr) for pr in prs]
+            encoded = self._encoded
+        response: dict = {"ok": True, "generation": generation, "updated": updated}
+        if cmd == "snapshot":
+            if request.get("generation") != generation:
+                response["prs"] = encoded
+        else:
+            repos = build_repo_index([pr.repo for pr in prs])
+            response["lines"] = render(prs, repos, bool(request.get("slack")), width=width)
+        return response
+
+    # ---- socket ----
+
+    def start(self) -> None:
+        """Bind the socket (taking over a stale one) and serve in a thread."""
+        if query({"cmd": "ping"}, self.path) is not None:
+            raise RuntimeError(f"a daemon is already listening on {self.path}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                line = self.rfile.readline(MAX_REQUEST_BYTES)
+                try:
+                    request = json.loads(line)
+                    response = daemon.handle(request if isinstance(request, dict) else {})
+                except ValueError:
+                    response = {"ok": False, "error": "bad request"}
+                self.wfile.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+
+        old_umask = os.umask(0o177)  # PR titles are nobody else's business
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(str(self.path), Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+# ============================================================
+# Client
+# ============================================================
+
+
+def query(request: dict, path: Optional[Path] = None, timeout: float = 5.0) -> Optional[dict]:
+    """Send one request to the daemon. None when none is listening."""
+    path = path or socket_path()
+    if not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        response = json.loads(line)
+    except (OSError, ValueError):
+        return None
+    return response if isinstance(response, dict) else None
+
+
+def fetch_snapshot(
+    config: dict,
+    generation: int = 0,
+    path: Optional[Path] = None,
+) -> Optional[tuple[int, Optional[list[PR]]]]:
+    """(generation, PRs) from a daemon polling for `config`, PRs None if
+    unchanged since `generation`. None when no matching daemon answers."""
+    response = query({"cmd": "snapshot", "generation": generation, **config}, path)
+    if not response or not response.get("ok"):
+        return None
+    prs = response.get("prs")
+    return response["generation"], None if prs is None else [pr_from_dict(d) for d in prs]
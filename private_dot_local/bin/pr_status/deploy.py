@@ -2,36 +2,193 @@
 
 from __future__ import annotations
 
+import json
 import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
 from typing import Optional
 
+from .cache import RepoMetaCache
 from .discover import Repo
+from .governor import RATE_LIMIT_FIELDS, get_governor
+from .metrics import get_metrics
 from .model import DeployState, PR, PRLifecycle
-from .util import gh_graphql, run
+from .util import gh_graphql, gh_rest, run
+
+
+@dataclass
+class RepoMeta:
+    """Slow-changing facts about a repo that deploy detection depends on."""
+    default_branch: str
+    branch_model: bool  # has both release and develop branches
+    # CI model: deploy status contexts, once discovered from commit history
+    contexts_known: bool = False
+    prod_ctx: Optional[str] = None
+    preprod_ctx: Optional[str] = None
+    # Last commits seen with a successful deploy ({"oid", "committedDate"});
+    # later scans only look at history newer than these.
+    prod_marker: Optional[dict] = None
+    preprod_marker: Optional[dict] = None
 
 
 def detect_deploy_status(
-    repo: Repo, prs: list[PR],
+    repo: Repo, prs: list[PR], meta_cache: Optional[RepoMetaCache] = None,
 ) -> tuple[dict[int, DeployState], list[str]]:
-    """Determine deployment status for merged PRs. Uses only GitHub API."""
+    """Determine deployment status for merged PRs. Uses only GitHub API.
+
+    With a `meta_cache`, the default branch, branch model and deploy context
+    names are reused while fresh, so steady-state checks go straight to the
+    state query.
+    """
     merged = [p for p in prs if p.lifecycle == PRLifecycle.MERGED]
     if not merged:
         return {}, []
 
-    owner, name = repo.owner_repo.split("/", 1)
-    warnings: list[str] = []
-
-    default_branch = _detect_default_branch(repo)
-    if not default_branch:
-        return {p.number: DeployState.UNKNOWN for p in merged}, ["could not detect default branch"]
+    meta = _cached_meta(meta_cache, repo.owner_repo)
+    if meta is None:
+        default_branch = _detect_default_branch(repo)
+        if not default_branch:
+            return {p.number: DeployState.UNKNOWN for p in merged}, ["could not detect default branch"]
+        has_branches = _check_branches_exist(repo, ["release", "develop"])
+        meta = RepoMeta(
+            default_branch=default_branch,
+            branch_model="release" in has_branches and "develop" in has_branches,
+        )
+        if meta_cache:
+            meta_cache.put(repo.owner_repo, asdict(meta))
 
     # Strategy 1: develop/release branch model (no API calls for status)
-    has_branches = _check_branches_exist(repo, ["release", "develop"])
-    if "release" in has_branches and "develop" in has_branches:
+    if meta.branch_model:
         return _deploy_via_branches(repo, merged)
 
     # Strategy 2: CI commit statuses
-    return _deploy_via_ci(repo, merged, default_branch)
+    before = asdict(meta)
+    result = _deploy_via_ci(repo, merged, meta)
+    if meta_cache and asdict(meta) != before:
+        meta_cache.put(repo.owner_repo, asdict(meta), refresh=False)
+    return result
+
+
+def _cached_meta(meta_cache: Optional[RepoMetaCache], owner_repo: str) -> Optional[RepoMeta]:
+    if meta_cache is None:
+        return None
+    cached = meta_cache.get(owner_repo)
+    meta = _meta_from_dict(cached) if cached else None
+    get_metrics().inc("pr_status_repo_meta_cache_total", result="hit" if meta else "miss")
+    return meta
+
+
+def _meta_from_dict(data: dict) -> Optional[RepoMeta]:
+    try:
+        return RepoMeta(**{f.name: data[f.name] for f in fields(RepoMeta) if f.name in data})
+    except TypeError:
+        return None
+
+
+# ============================================================
+# Batched detection (many repos per query)
+# ============================================================
+
+# Repos per aliased query; each may pull 30 commits with their status contexts
+DEPLOY_BATCH_SIZE = 10
+# How deep (in 30-commit pages) to look for deploy markers before giving up
+MAX_HISTORY_PAGES = 10
+_BRANCH_REF_FIELDS = """
+  release: ref(qualifiedName: "refs/heads/release") { target { ... on Commit { committedDate } } }
+  develop: ref(qualifiedName: "refs/heads/develop") { target { ... on Commit { committedDate } } }
+"""
+
+
+def detect_deploy_statuses(
+    repos: list[Repo],
+    repo_prs: dict[str, list[PR]],
+    meta_cache: Optional[RepoMetaCache] = None,
+) -> dict[str, tuple[dict[int, DeployState], list[str]]]:
+    """detect_deploy_status for many repos, sharing aliased GraphQL queries.
+
+    Each repo asks only for what its metadata says it needs: release/develop
+    tips for the branch model, default-branch history for the CI model, and
+    both (plus the default branch name) when the metadata isn't cached. A
+    chunk whose query fails outright falls back to per-repo detection.
+    """
+    results: dict[str, tuple[dict[int, DeployState], list[str]]] = {}
+    todo: list[tuple[Repo, list[PR], Optional[RepoMeta]]] = []
+    for repo in repos:
+        merged = [p for p in repo_prs.get(repo.owner_repo, []) if p.lifecycle == PRLifecycle.MERGED]
+        if not merged:
+            results[repo.owner_repo] = ({}, [])
+            continue
+        meta = _cached_meta(meta_cache, repo.owner_repo)
+        if meta and not meta.branch_model and meta.contexts_known and not meta.prod_ctx and not meta.preprod_ctx:
+            results[repo.owner_repo] = ({p.number: DeployState.PROD for p in merged}, [])
+            continue
+        todo.append((repo, merged, meta))
+
+    chunks = [todo[i:i + DEPLOY_BATCH_SIZE] for i in range(0, len(todo), DEPLOY_BATCH_SIZE)]
+    if chunks:
+        with ThreadPoolExecutor(max_workers=get_governor().pool_size(min(4, len(chunks)))) as pool:
+            for chunk_result in pool.map(lambda c: _detect_chunk(c, meta_cache), chunks):
+                results.update(chunk_result)
+    return results
+
+
+def _detect_chunk(
+    chunk: list[tuple[Repo, list[PR], Optional[RepoMeta]]],
+    meta_cache: Optional[RepoMetaCache],
+) -> dict[str, tuple[dict[int, DeployState], list[str]]]:
+    parts: list[str] = []
+    for i, (repo, _, meta) in enumerate(chunk):
+        owner, name = repo.owner_repo.split("/", 1)
+        if meta is None:
+            selection = f"defaultBranchRef {{ name target {{ {_history_fields(None)} }} }}" + _BRANCH_REF_FIELDS
+        elif meta.branch_model:
+            selection = _BRANCH_REF_FIELDS
+        else:
+            selection = f"object(expression: {json.dumps(meta.default_branch)}) {{ {_history_fields(meta)} }}"
+        parts.append(
+            f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {selection} }}"
+        )
+
+    data = gh_graphql("query {\n" + "\n".join(parts) + f"\n{RATE_LIMIT_FIELDS}\n}}")
+    repos_data = (data or {}).get("data") or {}
+    if not repos_data:
+        return {
+            repo.owner_repo: detect_deploy_status(repo, merged, meta_cache)
+            for repo, merged, _ in chunk
+        }
+
+    results: dict[str, tuple[dict[int, DeployState], list[str]]] = {}
+    for i, (repo, merged, meta) in enumerate(chunk):
+        repo_data = repos_data.get(f"r{i}")
+        if not repo_data:
+            results[repo.owner_repo] = (
+                {p.number: DeployState.UNKNOWN for p in merged}, ["GraphQL query failed"],
+            )
+            continue
+
+        fresh = meta is None
+        if meta is None:
+            default_ref = repo_data.get("defaultBranchRef") or {}
+            meta = RepoMeta(
+                default_branch=default_ref.get("name") or "main",
+                branch_model=bool(repo_data.get("release") and repo_data.get("develop")),
+            )
+            history_owner = default_ref.get("target")
+        else:
+            history_owner = repo_data.get("object")
+
+        before = asdict(meta)
+        if meta.branch_model:
+            results[repo.owner_repo] = _classify_by_branches(merged, repo_data)
+        else:
+            history = (history_owner or {}).get("history") or {}
+            results[repo.owner_repo] = _classify_by_ci(repo, merged, history, meta)
+
+        if meta_cache and fresh:
+            meta_cache.put(repo.owner_repo, asdict(meta))
+        elif meta_cache and asdict(meta) != before:
+            meta_cache.put(repo.owner_repo, asdict(meta), refresh=False)
+    return results
 
 
 def _detect_default_branch(repo: Repo) -> Optional[str]:
@@ -46,8 +203,8 @@ def _detect_default_branch(repo: Repo) -> Optional[str]:
             if run(["git", "rev-parse", f"origin/{candidate}"], env={"GIT_DIR": repo.git_dir}):
                 return candidate
 
-    result = run(["gh", "api", f"repos/{repo.owner_repo}", "--jq", ".default_branch"])
-    return result if result else "main"
+    data = gh_rest(f"repos/{repo.owner_repo}")
+    return (data or {}).get("default_branch") or "main"
 
 
 def _check_branches_exist(repo: Repo, branches: list[str]) -> set[str]:
@@ -58,7 +215,7 @@ def _check_branches_exist(repo: Repo, branches: list[str]) -> set[str]:
                 found.add(b)
     else:
         for b in branches:
-            if run(["gh", "api", f"repos/{repo.owner_repo}/branches/{b}", "--jq", ".name"]):
+            if gh_rest(f"repos/{repo.owner_repo}/branches/{b}"):
                 found.add(b)
     return found
 
@@ -83,7 +240,14 @@ def _deploy_via_branches(
     if not data:
         return {p.number: DeployState.UNKNOWN for p in merged}, ["GraphQL query failed"]
 
-    repo_data = data.get("data", {}).get("repository", {})
+    repo_data = (data.get("data") or {}).get("repository") or {}
+    return _classify_by_branches(merged, repo_data)
+
+
+def _classify_by_branches(
+    merged: list[PR], repo_data: dict,
+) -> tuple[dict[int, DeployState], list[str]]:
+    """Merged before release tip => prod; before develop tip => preprod."""
     release_date = (repo_data.get("release") or {}).get("target", {}).get("committedDate", "")
     develop_date = (repo_data.get("develop") or {}).get("target", {}).get("committedDate", "")
 
@@ -100,75 +264,91 @@ def _deploy_via_branches(
 
 
 def _deploy_via_ci(
-    repo: Repo, merged: list[PR], default_branch: str,
+    repo: Repo, merged: list[PR], meta: RepoMeta,
 ) -> tuple[dict[int, DeployState], list[str]]:
-    owner, name = repo.owner_repo.split("/", 1)
+    """Classify via deploy status contexts on the default branch.
 
-    query = '''query {
-      repository(owner: "%s", name: "%s") {
-        object(expression: "%s") {
-          ... on Commit {
-            history(first: 30) {
-              nodes {
-                oid
-                committedDate
-                status { contexts { context state } }
-              }
-            }
-          }
-        }
-      }
-    }''' % (owner, name, default_branch)
+    Fills in meta's context names and deploy markers as they're found.
+    """
+    if meta.contexts_known and not meta.prod_ctx and not meta.preprod_ctx:
+        return {p.number: DeployState.PROD for p in merged}, []
 
-    data = gh_graphql(query, repo.git_dir)
-    if not data:
+    history = _fetch_history_page(repo, meta)
+    if history is None:
         return {p.number: DeployState.UNKNOWN for p in merged}, ["GraphQL query failed"]
+    return _classify_by_ci(repo, merged, history, meta)
+
 
-    nodes = (
-        data.get("data", {})
-        .get("repository", {})
-        .get("object", {})
-        .get("history", {})
-        .get("nodes", [])
+def _history_fields(meta: Optional[RepoMeta], after: Optional[str] = None) -> str:
+    """Default-branch history selection, newest first.
+
+    Once every deploy context has a remembered marker, only commits since the
+    oldest marker are requested.
+    """
+    args = ["first: 30"]
+    since = _marker_since(meta)
+    if since:
+        args.append(f"since: {json.dumps(since)}")
+    if after:
+        args.append(f"after: {json.dumps(after)}")
+    return (
+        f"... on Commit {{ history({', '.join(args)}) {{\n"
+        "  nodes { oid committedDate status { contexts { context state } } }\n"
+        "  pageInfo { hasNextPage endCursor }\n"
+        "} }"
     )
-    if not nodes:
-        return {p.number: DeployState.UNKNOWN for p in merged}, ["no commits on default branch"]
 
-    # Discover deploy context names
-    all_contexts: set[str] = set()
-    for node in nodes:
-        for ctx in (node.get("status") or {}).get("contexts", []):
-            all_contexts.add(ctx.get("context", ""))
 
-    prod_ctx = None
-    preprod_ctx = None
-    for ctx in sorted(all_contexts):
-        if re.search(r"promot|deploy", ctx, re.I):
-            if re.search(r"prod", ctx, re.I) and not re.search(r"pre-?prod|staging", ctx, re.I):
-                if not prod_ctx:
-                    prod_ctx = ctx
-            if re.search(r"pre-?prod|staging", ctx, re.I):
-                if not preprod_ctx:
-                    preprod_ctx = ctx
+def _marker_since(meta: Optional[RepoMeta]) -> Optional[str]:
+    if not meta or not meta.contexts_known:
+        return None
+    dates = []
+    for ctx, marker in ((meta.prod_ctx, meta.prod_marker), (meta.preprod_ctx, meta.preprod_marker)):
+        if ctx:
+            if not marker or not marker.get("committedDate"):
+                return None
+            dates.append(marker["committedDate"])
+    return min(dates) if dates else None
+
+
+def _fetch_history_page(
+    repo: Repo, meta: RepoMeta, after: Optional[str] = None,
+) -> Optional[dict]:
+    owner, name = repo.owner_repo.split("/", 1)
+    query = (
+        f"query {{ repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ "
+        f"object(expression: {json.dumps(meta.default_branch)}) {{ {_history_fields(meta, after)} }} "
+        "} }"
+    )
+    data = gh_graphql(query, repo.git_dir)
+    if not data:
+        return None
+    return (
+        (((data.get("data") or {}).get("repository") or {}).get("object") or {})
+        .get("history")
+    ) or {}
+
+
+def _classify_by_ci(
+    repo: Repo, merged: list[PR], history: dict, meta: RepoMeta,
+) -> tuple[dict[int, DeployState], list[str]]:
+    """Merged before the last successful prod/preprod deploy marker commit."""
+    incremental = _marker_since(meta) is not None
+    nodes = history.get("nodes") or []
+    if not nodes and not incremental:
+        return {p.number: DeployState.UNKNOWN for p in merged}, ["no commits on default branch"]
+
+    if not meta.contexts_known:
+        meta.prod_ctx, meta.preprod_ctx = _discover_deploy_contexts(nodes)
+        meta.contexts_known = True
+    prod_ctx, preprod_ctx = meta.prod_ctx, meta.preprod_ctx
 
     if not prod_ctx and not preprod_ctx:
         return {p.number: DeployState.PROD for p in merged}, []
 
-    # Find deploy marker timestamps
-    prod_date = None
-    preprod_date = None
-    for node in nodes:
-        by_ctx = {
-            c["context"]: c["state"]
-            for c in (node.get("status") or {}).get("contexts", [])
-        }
-        commit_date = node.get("committedDate", "")
-        if prod_ctx and not prod_date and by_ctx.get(prod_ctx) == "SUCCESS":
-            prod_date = commit_date
-        if preprod_ctx and not preprod_date and by_ctx.get(preprod_ctx) == "SUCCESS":
-            preprod_date = commit_date
-        if (prod_date or not prod_ctx) and (preprod_date or not preprod_ctx):
-            break
+    _scan_deploy_markers(repo, meta, history)
+    prod_date = (meta.prod_marker or {}).get("committedDate") if prod_ctx else None
+    preprod_date = (meta.preprod_marker or {}).get("committedDate") if preprod_ctx else None
 
     warnings: list[str] = []
     if preprod_ctx and not preprod_date:
@@ -187,3 +367,60 @@ def _deploy_via_ci(
         else:
             result[pr.number] = DeployState.MERGED
     return result, warnings
+
+
+def _scan_deploy_markers(repo: Repo, meta: RepoMeta, history: dict) -> None:
+    """Find the newest successful commit per deploy context.
+
+    Walks history newest-first, following the cursor until every context has
+    a marker or MAX_HISTORY_PAGES is reached. Contexts without a newer
+    success keep their remembered marker.
+    """
+    wanted = {
+        ctx: attr
+        for ctx, attr in ((meta.prod_ctx, "prod_marker"), (meta.preprod_ctx, "preprod_marker"))
+        if ctx
+    }
+    found: dict[str, dict] = {}
+    page, pages = history, 1
+    while True:
+        for node in page.get("nodes") or []:
+            by_ctx = {
+                c["context"]: c["state"]
+                for c in (node.get("status") or {}).get("contexts", [])
+            }
+            for ctx in wanted:
+                if ctx not in found and by_ctx.get(ctx) == "SUCCESS":
+                    found[ctx] = {"oid": node.get("oid", ""), "committedDate": node.get("committedDate", "")}
+            if len(found) == len(wanted):
+                break
+        info = page.get("pageInfo") or {}
+        if len(found) == len(wanted) or not info.get("hasNextPage") or pages >= MAX_HISTORY_PAGES:
+            break
+        next_page = _fetch_history_page(repo, meta, info.get("endCursor"))
+        if not next_page:
+            break
+        page, pages = next_page, pages + 1
+
+    for ctx, marker in found.items():
+        setattr(meta, wanted[ctx], marker)
+
+
+def _discover_deploy_contexts(nodes: list[dict]) -> tuple[Optional[str], Optional[str]]:
+    """Pick the prod and preprod deploy status contexts seen in history."""
+    all_contexts: set[str] = set()
+    for node in nodes:
+        for ctx in (node.get("status") or {}).get("contexts", []):
+            all_contexts.add(ctx.get("context", ""))
+
+    prod_ctx = None
+    preprod_ctx = None
+    for ctx in sorted(all_contexts):
+        if re.search(r"promot|deploy", ctx, re.I):
+            if re.search(r"prod", ctx, re.I) and not re.search(r"pre-?prod|staging", ctx, re.I):
+                if not prod_ctx:
+                    prod_ctx = ctx
+            if re.search(r"pre-?prod|staging", ctx, re.I):
+                if not preprod_ctx:
+                    preprod_ctx = ctx
+    return prod_ctx, preprod_ctx
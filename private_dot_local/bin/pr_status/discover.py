@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
-import json
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
-from .util import run
+from .governor import RATE_LIMIT_FIELDS, get_governor
+from .util import gh_graphql, run
 
 
 @dataclass
@@ -126,21 +130,35 @@ def _find_git_dir(d: Path) -> Optional[str]:
 # Global PR discovery
 # ============================================================
 
-SEARCH_FIELDS = "number,title,state,isDraft,createdAt,updatedAt,closedAt,url,repository,author"
-
-
-def _parse_search_results(raw: Optional[str], source: str) -> list[dict]:
-    if not raw:
-        return []
-
-    try:
-        prs = json.loads(raw)
-    except json.JSONDecodeError:
+SEARCH_PAGE_SIZE = 100
+SEARCH_RESULT_CAP = 1000  # GitHub search never returns more, however many pages
+
+SEARCH_QUERY = """
+query($q: String!, $after: String) {
+  search(query: $q, type: ISSUE, first: %d, after: $after) {
+    issueCount
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      ... on PullRequest {
+        number title state isDraft createdAt updatedAt closedAt url
+        repository { nameWithOwner }
+        author { login }
+      }
+    }
+  }
+  %s
+}
+""" % (SEARCH_PAGE_SIZE, RATE_LIMIT_FIELDS)
+
+
+def _parse_search_results(data: Optional[dict], source: str) -> list[dict]:
+    if not data:
         return []
 
+    nodes = ((data.get("data") or {}).get("search") or {}).get("nodes") or []
     items = []
-    for pr in prs:
-        repo = (pr.get("repository") or {}).get("nameWithOwner", "")
+    for pr in nodes:
+        repo = ((pr or {}).get("repository") or {}).get("nameWithOwner", "")
         if not repo:
             continue
         pr["_repo"] = repo
@@ -149,45 +167,191 @@ def _parse_search_results(raw: Optional[str], source: str) -> list[dict]:
     return items
 
 
-def _search_prs(args: list[str], source: str) -> list[dict]:
-    result = run(
-        ["gh", "search", "prs", "--limit", "100", "--json", SEARCH_FIELDS, *args],
-        timeout=30,
-        warn_on_failure=f"search ({source})",
-    )
-    return _parse_search_results(result, source)
+def _search_prs(
+    terms: list[str], source: str, dated: bool = False,
+) -> Optional[list[dict]]:
+    """Run one search, following pages; None if a request failed (as opposed
+    to no results).
+
+    Hitting GitHub's search cap is reported through the governor's warnings,
+    which end up in the output; for `dated` searches (bounded by --days) the
+    warning suggests a shorter window.
+    """
+    q = " ".join(["is:pr", *terms, "sort:updated-desc"])
+    items: list[dict] = []
+    cursor: Optional[str] = None
+    while True:
+        variables = {"q": q, **({"after": cursor} if cursor else {})}
+        data = gh_graphql(SEARCH_QUERY, variables=variables)
+        if data is None:
+            print(f"\033[2m  ⚠ search ({source}): request failed\033[0m", file=sys.stderr)
+            return None
+        page = _parse_search_results(data, source)
+        items.extend(page)
+
+        search = (data.get("data") or {}).get("search") or {}
+        info = search.get("pageInfo") or {}
+        cursor = info.get("endCursor")
+        if not info.get("hasNextPage") or not cursor:
+            break
+
+    total = search.get("issueCount") or 0
+    if len(items) >= SEARCH_RESULT_CAP and total > len(items):
+        hint = "; use a shorter --days" if dated else ""
+        get_governor().warn(f"search ({source}) capped at {len(items)} of {total} PRs{hint}")
+    return items
 
 
-def discover_pr_stubs(author: str, since: str) -> list[dict]:
-    """Discover authored, merged, and review-requested PRs globally."""
+@dataclass
+class SearchBucket:
+    source: str
+    terms: list[str]  # full search
+    # Incremental search (plus an updated:>= qualifier). Leaves out state
+    # filters so PRs moving out of the bucket are seen too.
+    delta_terms: list[str]
+    keep_state: Optional[str] = None  # stub state required to stay in the bucket
+    dated: bool = False  # bounded by --days in the query itself
+
+
+def _bucket_searches(author: str, since: str) -> list[SearchBucket]:
     since_day = since[:10]
-    buckets = [
-        _search_prs(["--author", author, "--state", "open"], "authored_open"),
-        _search_prs(["--review-requested", author, "--state", "open"], "review_requested"),
-        _search_prs(["--author", author, "--merged", "--merged-at", f">={since_day}"], "authored_merged"),
+    merged_terms = [f"author:{author}", "is:merged", f"merged:>={since_day}"]
+    return [
+        SearchBucket("authored_open", [f"author:{author}", "is:open"], [f"author:{author}"], "OPEN"),
+        SearchBucket(
+            "review_requested",
+            [f"review-requested:{author}", "is:open"], [f"review-requested:{author}"], "OPEN",
+        ),
+        SearchBucket("authored_merged", merged_terms, merged_terms, dated=True),
     ]
 
-    merged: dict[tuple[str, int], dict] = {}
-    for bucket in buckets:
-        for pr in bucket:
+
+# Subtracted from each high-water mark to cover search index lag.
+HIGH_WATER_OVERLAP = timedelta(minutes=5)
+# Delta searches can't see a PR leave a bucket without a matching update (e.g.
+# a review request being withdrawn), so a full pass reconciles periodically.
+FULL_SYNC_INTERVAL = 15 * 60
+
+
+class Discovery:
+    """Search-bucket discovery that can run incrementally across cycles.
+
+    The first pass (and one every `full_sync_interval` seconds) runs the full
+    bucket searches. In between, each bucket only asks for PRs updated since
+    its high-water mark of updatedAt and merges them into the retained stubs,
+    so per-cycle cost follows activity rather than history.
+    """
+
+    def __init__(
+        self, author: str, since: str, full_sync_interval: float = FULL_SYNC_INTERVAL,
+    ) -> None:
+        self.buckets = _bucket_searches(author, since)
+        self.full_sync_interval = full_sync_interval
+        self.members: dict[str, dict[tuple[str, int], dict]] = {}
+        self.high_water: dict[str, str] = {}
+        self.last_full_sync: Optional[float] = None
+
+    def _terms(self, bucket: SearchBucket, full: bool) -> list[str]:
+        mark = self.high_water.get(bucket.source)
+        if full or not mark:
+            return bucket.terms
+        try:
+            since = datetime.strptime(mark, "%Y-%m-%dT%H:%M:%SZ") - HIGH_WATER_OVERLAP
+        except ValueError:
+            return bucket.terms
+        return [*bucket.delta_terms, f"updated:>={since.strftime('%Y-%m-%dT%H:%M:%SZ')}"]
+
+    def _apply(self, bucket: SearchBucket, results: list[dict], full: bool) -> None:
+        members = self.members.setdefault(bucket.source, {})
+        if full:
+            members.clear()
+        for pr in results:
             key = (pr["_repo"], pr["number"])
-            existing = merged.get(key)
-            if existing:
-                sources = set(existing.get("_sources") or [])
-                sources.update(pr.get("_sources") or [])
-                existing["_sources"] = sorted(sources)
-                if pr.get("updatedAt", "") > existing.get("updatedAt", ""):
-                    existing.update({k: v for k, v in pr.items() if not k.startswith("_")})
+            if bucket.keep_state and pr.get("state") != bucket.keep_state:
+                members.pop(key, None)
             else:
-                merged[key] = pr
-
+                members[key] = pr
+        mark = max((pr.get("updatedAt") or "" for pr in results), default="")
+        if mark > self.high_water.get(bucket.source, ""):
+            self.high_water[bucket.source] = mark
+
+    def stream(self) -> Iterator[list[dict]]:
+        """Yield newly seen stubs as each bucket search completes.
+
+        A PR already yielded by an earlier bucket is not yielded again; its
+        `_sources` (and fields, if newer) are merged into the yielded dict in
+        place, so consumers should read `_sources` only once the stream is
+        exhausted. Incremental passes yield the retained set in one chunk.
+        """
+        now = time.monotonic()
+        full = (
+            self.last_full_sync is None
+            or now - self.last_full_sync >= self.full_sync_interval
+        )
+        searches = [(bucket, self._terms(bucket, full)) for bucket in self.buckets]
+        seen: dict[tuple[str, int], dict] = {}
+        with ThreadPoolExecutor(max_workers=get_governor().pool_size(len(searches))) as pool:
+            futures = {
+                pool.submit(_search_prs, terms, bucket.source, bucket.dated): (bucket, terms)
+                for bucket, terms in searches
+            }
+            for f in as_completed(futures):
+                bucket, terms = futures[f]
+                results = f.result()
+                if results is not None:  # on failure, keep what we had
+                    self._apply(bucket, results, terms is bucket.terms)
+                if not full:
+                    continue
+                fresh = []
+                for pr in self.members.get(bucket.source, {}).values():
+                    key = (pr["_repo"], pr["number"])
+                    if key in seen:
+                        _merge_stub(seen[key], pr)
+                    else:
+                        seen[key] = {**pr, "_sources": [bucket.source]}
+                        fresh.append(seen[key])
+                if fresh:
+                    yield fresh
+        if full:
+            self.last_full_sync = now
+            return
+
+        for bucket in self.buckets:
+            for key, pr in self.members.get(bucket.source, {}).items():
+                if key in seen:
+                    _merge_stub(seen[key], pr)
+                else:
+                    seen[key] = {**pr, "_sources": [bucket.source]}
+        if seen:
+            yield list(seen.values())
+
+
+def stream_pr_stubs(author: str, since: str) -> Iterator[list[dict]]:
+    """One-shot concurrent discovery; see Discovery.stream."""
+    return Discovery(author, since).stream()
+
+
+def _merge_stub(existing: dict, pr: dict) -> None:
+    sources = set(existing.get("_sources") or [])
+    sources.update(pr.get("_sources") or [])
+    existing["_sources"] = sorted(sources)
+    if pr.get("updatedAt", "") > existing.get("updatedAt", ""):
+        existing.update({k: v for k, v in pr.items() if not k.startswith("_")})
+
+
+def sort_stubs(pr_stubs: list[dict]) -> list[dict]:
     return sorted(
-        merged.values(),
+        pr_stubs,
         key=lambda pr: pr.get("updatedAt") or pr.get("createdAt", ""),
         reverse=True,
     )
 
 
+def discover_pr_stubs(author: str, since: str) -> list[dict]:
+    """Discover authored, merged, and review-requested PRs globally."""
+    return sort_stubs([pr for chunk in stream_pr_stubs(author, since) for pr in chunk])
+
+
 def discover_repos_from_prs(author: str, since: str) -> list[Repo]:
     seen: dict[str, Repo] = {}
     for item in discover_pr_stubs(author, since):
@@ -3,34 +3,267 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-from .model import PR, parse_pr
-from .util import run
+from .cache import EnrichCache
+from .model import FAILED_CHECK_STATES, PR, parse_pr
+from .governor import RATE_LIMIT_FIELDS, get_governor
+from .util import gh_cli, gh_graphql
 
-PR_FIELDS = (
-    "number,title,state,isDraft,createdAt,updatedAt,mergedAt,mergeCommit,"
-    "headRefName,baseRefName,author,reviews,reviewRequests,comments,"
-    "statusCheckRollup,reviewDecision,mergeStateStatus,mergeable,url"
+# Field sets per kind of PR ("profile"). Merged and closed PRs only need what
+# deploy detection and their row use, not reviews, checks or comments. PRs we
+# were only asked to review skip comments (human-comment notifications are for
+# our own PRs) and the merge state (which is for the author to act on).
+FULL, REVIEWER, TERMINAL = "full", "reviewer", "terminal"
+
+_CORE_FIELDS = "number,title,state,isDraft,createdAt,updatedAt,mergedAt,mergeCommit,url"
+_REVIEW_FIELDS = (
+    "headRefName,baseRefName,author,reviews,reviewRequests,statusCheckRollup,"
+    "reviewDecision,mergeable"
 )
+_AUTHOR_FIELDS = "comments,mergeStateStatus"
+
+PR_FIELDS_BY_PROFILE = {
+    FULL: ",".join((_CORE_FIELDS, _REVIEW_FIELDS, _AUTHOR_FIELDS)),
+    REVIEWER: ",".join((_CORE_FIELDS, _REVIEW_FIELDS)),
+    TERMINAL: _CORE_FIELDS,
+}
+
+# GraphQL selections equivalent to the above (what `gh pr view --json` asks
+# for), but bounded however big the PR: the rollup's aggregate state and counts
+# plus a sample of contexts for failing check names, each reviewer's latest
+# (and latest opinionated) review, and the comment count plus the newest few.
+CHECK_SAMPLE = 25
+COMMENT_WINDOW = 20
+
+_CORE_GRAPHQL = """
+  number title state isDraft createdAt updatedAt mergedAt url
+  mergeCommit { oid }
+"""
+_REVIEW_GRAPHQL = """
+  headRefName baseRefName
+  author { login }
+  reviewDecision mergeable
+  latestOpinionatedReviews(first: 100) { nodes { author { login } state submittedAt } }
+  latestReviews(first: 100) { nodes { author { login } state submittedAt } }
+  reviewRequests(first: 100) {
+    nodes { requestedReviewer {
+      ... on User { login } ... on Bot { login } ... on Mannequin { login } ... on Team { name }
+    } }
+  }
+  commits(last: 1) { nodes { commit { statusCheckRollup {
+    state
+    contexts(first: %(checks)d) {
+      checkRunCountsByState { state count }
+      statusContextCountsByState { state count }
+      nodes {
+        __typename
+        ... on CheckRun { name conclusion status }
+        ... on StatusContext { context state }
+      }
+    }
+  } } } }
+""" % {"checks": CHECK_SAMPLE}
+_AUTHOR_GRAPHQL = """
+  mergeStateStatus
+  comments(last: %(comments)d) { totalCount nodes { author { login } createdAt } }
+""" % {"comments": COMMENT_WINDOW}
+
+# profile -> (fragment name, selection)
+PR_FRAGMENTS = {
+    FULL: ("PRFields", _CORE_GRAPHQL + _REVIEW_GRAPHQL + _AUTHOR_GRAPHQL),
+    REVIEWER: ("ReviewerPRFields", _CORE_GRAPHQL + _REVIEW_GRAPHQL),
+    TERMINAL: ("TerminalPRFields", _CORE_GRAPHQL),
+}
+
+
+def field_profile(pr_stub: dict) -> str:
+    """Which field set a PR needs, from its search state and sources."""
+    sources = set(pr_stub.get("_sources") or [])
+    state = pr_stub.get("state")
+    if state in ("MERGED", "CLOSED") or (state is None and sources == {"authored_merged"}):
+        return TERMINAL
+    if sources == {"review_requested"}:
+        return REVIEWER
+    return FULL
+
+
+# PRs per aliased query. Keeps each response well under GitHub's node limits.
+BATCH_SIZE = 25
+MAX_BATCH_WORKERS = 4
 
 
 def enrich_pr(pr_stub: dict) -> Optional[PR]:
     """Fetch the rich PR details needed for rendering and notifications."""
-    result = run(
+    raw = _fetch_pr_raw(pr_stub)
+    if raw is None:
+        return None
+    return parse_pr(raw, pr_stub["_repo"], list(pr_stub.get("_sources") or []))
+
+
+def _fetch_pr_raw(pr_stub: dict) -> Optional[dict]:
+    result = gh_cli(
         [
             "gh", "pr", "view", str(pr_stub["number"]),
             "--repo", pr_stub["_repo"],
-            "--json", PR_FIELDS,
+            "--json", PR_FIELDS_BY_PROFILE[field_profile(pr_stub)],
         ],
+        "graphql",
         timeout=30,
     )
     if not result:
         return None
 
     try:
-        raw = json.loads(result)
+        return json.loads(result)
     except json.JSONDecodeError:
         return None
 
-    return parse_pr(raw, pr_stub["_repo"], list(pr_stub.get("_sources") or []))
+
+def enrich_prs(
+    pr_stubs: list[dict], cache: Optional[EnrichCache] = None,
+) -> dict[tuple[str, int], PR]:
+    """Enrich many PRs (across repos) using a few aliased GraphQL queries.
+
+    Batches that fail as a whole fall back to one `gh pr view` per PR. Raw
+    payloads are written to `cache` (if given) keyed by the stub's updatedAt.
+    """
+    batches = split_batches(pr_stubs)
+    result: dict[tuple[str, int], PR] = {}
+    if not batches:
+        return result
+
+    workers = get_governor().pool_size(min(MAX_BATCH_WORKERS, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch_result in pool.map(lambda b: enrich_batch(b, cache), batches):
+            result.update(batch_result)
+    return result
+
+
+def split_batches(pr_stubs: list[dict]) -> list[list[dict]]:
+    return [pr_stubs[i:i + BATCH_SIZE] for i in range(0, len(pr_stubs), BATCH_SIZE)]
+
+
+def enrich_batch(
+    pr_stubs: list[dict], cache: Optional[EnrichCache] = None,
+) -> dict[tuple[str, int], PR]:
+    """Enrich up to BATCH_SIZE PRs with a single query."""
+    result: dict[tuple[str, int], PR] = {}
+    for pr_stub, raw in _fetch_batch_raw(pr_stubs):
+        repo, number = pr_stub["_repo"], pr_stub["number"]
+        if cache is not None:
+            cache.put(repo, number, pr_stub.get("updatedAt", ""), raw)
+        result[(repo, number)] = parse_pr(raw, repo, list(pr_stub.get("_sources") or []))
+    return result
+
+
+def _fetch_batch_raw(pr_stubs: list[dict]) -> list[tuple[dict, dict]]:
+    query, aliases = build_batch_query(pr_stubs)
+    data = gh_graphql(query)
+    repos = (data or {}).get("data") or {}
+    if not repos:
+        return _fetch_individually(pr_stubs)
+
+    result: list[tuple[dict, dict]] = []
+    for (repo_alias, pr_alias), pr_stub in aliases.items():
+        node = (repos.get(repo_alias) or {}).get(pr_alias)
+        if node:
+            result.append((pr_stub, normalize_pr_node(node)))
+    return result
+
+
+def _fetch_individually(pr_stubs: list[dict]) -> list[tuple[dict, dict]]:
+    result: list[tuple[dict, dict]] = []
+    for pr_stub in pr_stubs:
+        raw = _fetch_pr_raw(pr_stub)
+        if raw is not None:
+            result.append((pr_stub, raw))
+    return result
+
+
+def build_batch_query(
+    pr_stubs: list[dict],
+) -> tuple[str, dict[tuple[str, str], dict]]:
+    """Build one aliased query for the given stubs.
+
+    Returns the query and a map of (repo_alias, pr_alias) -> stub.
+    """
+    by_repo: dict[str, list[dict]] = {}
+    for pr_stub in pr_stubs:
+        by_repo.setdefault(pr_stub["_repo"], []).append(pr_stub)
+
+    parts: list[str] = []
+    aliases: dict[tuple[str, str], dict] = {}
+    profiles: set[str] = set()
+    for i, (owner_repo, stubs) in enumerate(by_repo.items()):
+        owner, name = owner_repo.split("/", 1)
+        repo_alias = f"r{i}"
+        prs = []
+        for pr_stub in stubs:
+            pr_alias = f"p{int(pr_stub['number'])}"
+            aliases[(repo_alias, pr_alias)] = pr_stub
+            profile = field_profile(pr_stub)
+            profiles.add(profile)
+            fragment = PR_FRAGMENTS[profile][0]
+            prs.append(f"{pr_alias}: pullRequest(number: {int(pr_stub['number'])}) {{ ...{fragment} }}")
+        parts.append(
+            f"{repo_alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{\n"
+            + "\n".join(prs)
+            + "\n}"
+        )
+
+    # Only the fragments in use: GraphQL rejects unused ones
+    fragments = "".join(
+        f"fragment {name} on PullRequest {{{selection}}}\n"
+        for profile, (name, selection) in PR_FRAGMENTS.items() if profile in profiles
+    )
+    query = "query {\n" + "\n".join(parts) + f"\n{RATE_LIMIT_FIELDS}\n}}\n" + fragments
+    return query, aliases
+
+
+def normalize_pr_node(node: dict) -> dict:
+    """Reshape a GraphQL PullRequest node into the `gh pr view --json` shape.
+
+    Aggregates that have no --json equivalent are kept under extra keys:
+    statusCheckState and failingCheckCount for the rollup, commentCount for
+    the thread when only its newest comments were fetched.
+    """
+    raw = {
+        k: v for k, v in node.items()
+        if k not in (
+            "reviews", "latestReviews", "latestOpinionatedReviews", "reviewRequests",
+            "comments", "commits",
+        )
+    }
+    # Latest review per author, plus each author's latest approval or change
+    # request if they commented since: parse_reviewers replays them in order
+    reviews: dict[tuple, dict] = {}
+    for key in ("reviews", "latestOpinionatedReviews", "latestReviews"):
+        for r in (node.get(key) or {}).get("nodes") or []:
+            reviews[((r.get("author") or {}).get("login"), r.get("state"), r.get("submittedAt"))] = r
+    raw["reviews"] = sorted(reviews.values(), key=lambda r: r.get("submittedAt") or "")
+    raw["reviewRequests"] = [
+        n.get("requestedReviewer") or {}
+        for n in (node.get("reviewRequests") or {}).get("nodes") or []
+    ]
+    comments = node.get("comments") or {}
+    raw["comments"] = comments.get("nodes") or []
+    if "totalCount" in comments:
+        raw["commentCount"] = comments["totalCount"]
+
+    checks: list[dict] = []
+    for commit in (node.get("commits") or {}).get("nodes") or []:
+        rollup = (commit.get("commit") or {}).get("statusCheckRollup") or {}
+        contexts = rollup.get("contexts") or {}
+        checks.extend(contexts.get("nodes") or [])
+        if "state" in rollup:
+            raw["statusCheckState"] = rollup["state"]
+            raw["failingCheckCount"] = sum(
+                c.get("count", 0)
+                for key in ("checkRunCountsByState", "statusContextCountsByState")
+                for c in contexts.get(key) or []
+                if c.get("state") in FAILED_CHECK_STATES
+            )
+    raw["statusCheckRollup"] = checks
+    return raw
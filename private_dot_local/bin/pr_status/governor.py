@@ -0,0 +1,190 @@
+"""Client-side pacing of GitHub API calls.
+
+Every outgoing API call (transport requests and `gh` fallbacks) takes a slot
+from one shared Governor. It caps concurrency, spreads bursts with a token
+bucket (GitHub's secondary limits punish both), and tracks the primary quota
+per resource from X-RateLimit-* headers and GraphQL `rateLimit` fields. Once
+the remaining quota runs low, calls are spaced out so it lasts until the reset;
+below the reserve they wait for the reset, or fail fast with a warning when
+that is too far away.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+# Ask for this in big GraphQL queries so the governor sees their cost
+RATE_LIMIT_FIELDS = "rateLimit { cost remaining resetAt }"
+
+LOW_WATER = 0.2  # start pacing below this fraction of the quota
+
+
+class RateLimited(Exception):
+    """The quota is exhausted and resets later than we are willing to wait."""
+
+
+@dataclass
+class Quota:
+    limit: int
+    remaining: int
+    reset: float  # epoch seconds
+
+
+class Governor:
+    """Paces API calls from every worker pool against GitHub's rate limits."""
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 20,
+        max_concurrency: int = 8,
+        reserve: int = 50,
+        max_wait: float = 60.0,
+        clock=time.monotonic,
+        wall=time.time,
+        sleep=time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.clock = clock
+        self.wall = wall
+        self.sleep = sleep
+        self.quotas: dict[str, Quota] = {}
+        self._tokens = float(burst)
+        self._refilled = clock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._warnings: list[str] = []
+
+    # ---- pacing ----
+
+    @contextmanager
+    def slot(self, resource: str = "core") -> Iterator[None]:
+        """Hold a concurrency slot for one call, waiting as pacing requires.
+
+        Raises RateLimited when the quota won't come back within max_wait.
+        """
+        delay = self._reserve_call(resource)
+        if delay > 0:
+            self.sleep(delay)
+        with self._slots:
+            yield
+
+    def _reserve_call(self, resource: str) -> float:
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            self._tokens -= 1
+            delay = max(0.0, -self._tokens / self.rate)
+
+            quota = self.quotas.get(resource)
+            if quota is None:
+                return delay
+            until_reset = quota.reset - self.wall()
+            if until_reset <= 0:
+                del self.quotas[resource]  # window rolled over
+                return delay
+            if quota.remaining <= self.reserve:
+                if until_reset > self.max_wait:
+                    self._tokens += 1
+                    self._warn(f"{resource} rate limit exhausted until {_clock_time(quota.reset)}")
+                    raise RateLimited(resource)
+                return max(delay, until_reset)
+            quota.remaining -= 1  # until the response reports the real figure
+            if quota.remaining < quota.limit * LOW_WATER:
+                delay = max(delay, until_reset / (quota.remaining - self.reserve + 1))
+            return delay
+
+    def pool_size(self, wanted: int) -> int:
+        """Worker count for a pool about to make `wanted` parallel calls:
+        fewer once any quota runs low."""
+        with self._lock:
+            low = any(
+                q.remaining < q.limit * LOW_WATER and q.reset > self.wall()
+                for q in self.quotas.values()
+            )
+        return max(1, min(wanted, 1 if low else self.max_concurrency))
+
+    # ---- feedback ----
+
+    def observe_headers(self, headers: dict[str, str], resource: str = "core") -> None:
+        """Record X-RateLimit-* response headers (lowercased names)."""
+        try:
+            remaining = int(headers["x-ratelimit-remaining"])
+            limit = int(headers.get("x-ratelimit-limit") or remaining)
+            reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        self._record(headers.get("x-ratelimit-resource") or resource, limit, remaining, reset)
+
+    def observe_graphql(self, rate_limit: dict) -> None:
+        """Record a GraphQL `rateLimit { cost remaining resetAt }` selection."""
+        try:
+            remaining = int(rate_limit["remaining"])
+            reset = datetime.strptime(rate_limit["resetAt"], "%Y-%m-%dT%H:%M:%SZ")
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            limit = self.quotas["graphql"].limit if "graphql" in self.quotas else 5000
+        self._record("graphql", limit, remaining, reset.replace(tzinfo=timezone.utc).timestamp())
+
+    def backoff(self, status: int, headers: dict[str, str]) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited response, or None if
+        the response wasn't rate limited."""
+        if status not in (403, 429):
+            return None
+        if headers.get("retry-after", "").isdigit():
+            return float(headers["retry-after"])
+        if headers.get("x-ratelimit-remaining") == "0":
+            try:
+                return max(0.0, float(headers["x-ratelimit-reset"]) - self.wall()) + 1
+            except (KeyError, ValueError):
+                pass
+        if status == 429:
+            return 60.0  # secondary limit without guidance: GitHub asks for a minute
+        return None
+
+    def _record(self, resource: str, limit: int, remaining: int, reset: float) -> None:
+        with self._lock:
+            self.quotas[resource] = Quota(limit, remaining, reset)
+
+    # ---- warnings ----
+
+    def _warn(self, msg: str) -> None:
+        if msg not in self._warnings:
+            self._warnings.append(msg)
+
+    def warn(self, msg: str) -> None:
+        with self._lock:
+            self._warn(msg)
+
+    def take_warnings(self) -> list[str]:
+        with self._lock:
+            warnings, self._warnings = self._warnings, []
+        return warnings
+
+
+def _clock_time(epoch: float) -> str:
+    return time.strftime("%H:%M", time.localtime(epoch))
+
+
+_governor = Governor()
+
+
+def get_governor() -> Governor:
+    return _governor
+
+
+def set_governor(governor: Governor) -> None:
+    """Install a governor explicitly (tests, replay)."""
+    global _governor
+    _governor = governor
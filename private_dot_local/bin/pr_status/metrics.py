@@ -0,0 +1,226 @@
+"""In-process metrics: counters, gauges and latency histograms.
+
+Everything that talks to GitHub or spawns a process records into one shared
+registry. `--stats` prints a summary of it; `--metrics-file` writes it in the
+Prometheus text exposition format (for node_exporter's textfile collector)
+after every cycle. Values are cumulative for the life of the process.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from .cache import write_text_atomic
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "pr_status_api_requests_total": "GitHub API requests by endpoint and status",
+    "pr_status_api_request_seconds": "GitHub API request latency",
+    "pr_status_api_response_bytes_total": "GitHub API response bytes received",
+    "pr_status_http_cache_total": "Conditional REST requests answered from the cache (hit) or not",
+    "pr_status_subprocess_calls_total": "Subprocesses spawned by command",
+    "pr_status_subprocess_seconds": "Subprocess run time",
+    "pr_status_enrich_cache_total": "PR detail lookups by cache outcome",
+    "pr_status_repo_meta_cache_total": "Repo metadata lookups by cache outcome",
+    "pr_status_phase_seconds": "Time spent per cycle phase",
+    "pr_status_last_phase_seconds": "Duration of each phase in the last cycle",
+    "pr_status_prs": "PRs in the last snapshot by display state",
+    "pr_status_terminal_bytes_total": "Bytes written to the terminal in watch mode",
+}
+
+Labels = tuple  # sorted (name, value) pairs
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.counters: dict[str, dict[Labels, float]] = {}
+        self.gauges: dict[str, dict[Labels, float]] = {}
+        self.histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    # ---- recording ----
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self.gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def clear_gauge(self, name: str) -> None:
+        with self._lock:
+            self.gauges.pop(name, None)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - t0, **labels)
+
+    def phase(self, phase: str, seconds: float) -> None:
+        self.observe("pr_status_phase_seconds", seconds, phase=phase)
+        self.set("pr_status_last_phase_seconds", seconds, phase=phase)
+
+    # ---- reading ----
+
+    def total(self, name: str, **match: str) -> float:
+        with self._lock:
+            series = dict(self.counters.get(name, {}))
+        return sum(
+            v for key, v in series.items()
+            if all(dict(key).get(k) == val for k, val in match.items())
+        )
+
+    def by_label(self, name: str, label: str) -> dict[str, float]:
+        with self._lock:
+            series = dict(self.counters.get(name, {}))
+        result: dict[str, float] = {}
+        for key, v in series.items():
+            value = dict(key).get(label, "")
+            result[value] = result.get(value, 0) + v
+        return result
+
+    def merged_histogram(self, name: str) -> Histogram:
+        merged = Histogram()
+        with self._lock:
+            for h in self.histograms.get(name, {}).values():
+                merged.counts = [a + b for a, b in zip(merged.counts, h.counts)]
+                merged.sum += h.sum
+                merged.count += h.count
+        return merged
+
+    def summary(self) -> list[str]:
+        """Human-readable digest for --stats."""
+        lines = []
+        requests = self.by_label("pr_status_api_requests_total", "endpoint")
+        latency = self.merged_histogram("pr_status_api_request_seconds")
+        if requests:
+            per_endpoint = ", ".join(f"{k} {v:.0f}" for k, v in sorted(requests.items(), key=lambda kv: -kv[1]))
+            lines.append(
+                f"API requests:  {sum(requests.values()):.0f} ({per_endpoint}); "
+                f"p50 ≤{_ms(latency.quantile(0.5))}, p95 ≤{_ms(latency.quantile(0.95))}"
+            )
+            received = self.total("pr_status_api_response_bytes_total")
+            lines.append(f"Received:      {received / 1024:,.0f} KiB")
+        http_cache = self.by_label("pr_status_http_cache_total", "result")
+        if http_cache:
+            lines.append(f"HTTP cache:    {_ratio(http_cache)}")
+        procs = self.by_label("pr_status_subprocess_calls_total", "command")
+        if procs:
+            lines.append("Subprocesses:  " + ", ".join(f"{k} {v:.0f}" for k, v in sorted(procs.items())))
+        for label, name in (
+            ("Enrich cache:", "pr_status_enrich_cache_total"),
+            ("Repo cache:  ", "pr_status_repo_meta_cache_total"),
+        ):
+            outcomes = self.by_label(name, "result")
+            if outcomes:
+                lines.append(f"{label}  {_ratio(outcomes)}")
+        with self._lock:
+            last = dict(self.gauges.get("pr_status_last_phase_seconds", {}))
+        if last:
+            phases = "  ".join(f"{dict(k)['phase']} {v:.2f}s" for k, v in last.items())
+            lines.append(f"Last cycle:    {phases}")
+        return lines
+
+    def prometheus(self) -> str:
+        out: list[str] = []
+        with self._lock:
+            for kind, families in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted(families):
+                    _header(out, name, kind)
+                    for key, value in sorted(families[name].items()):
+                        out.append(f"{name}{_labels(key)} {_num(value)}")
+            for name in sorted(self.histograms):
+                _header(out, name, "histogram")
+                for key, h in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS + (float("inf"),), h.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else _num(bound)
+                        out.append(f"{name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                    out.append(f"{name}_sum{_labels(key)} {_num(h.sum)}")
+                    out.append(f"{name}_count{_labels(key)} {h.count}")
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: Path) -> None:
+        write_text_atomic(path, self.prometheus())
+
+
+def _header(out: list[str], name: str, kind: str) -> None:
+    if name in HELP:
+        out.append(f"# HELP {name} {HELP[name]}")
+    out.append(f"# TYPE {name} {kind}")
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    parts = []
+    for k, v in key:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _ms(seconds: float) -> str:
+    return "∞" if seconds == float("inf") else f"{seconds * 1000:.0f}ms"
+
+
+def _ratio(outcomes: dict[str, float]) -> str:
+    total = sum(outcomes.values())
+    misses = outcomes.get("miss", 0)
+    hit_rate = (total - misses) / total if total else 0
+    parts = ", ".join(f"{k} {v:.0f}" for k, v in sorted(outcomes.items()))
+    return f"{hit_rate:.0%} hit ({parts})"
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _metrics
@@ -6,7 +6,9 @@ Defines the state types, aggregation rules, and priority ordering.
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import re
+import sys
+from dataclasses import dataclass, field, fields
 from enum import Enum, auto
 from typing import Optional
 
@@ -113,23 +115,32 @@ DISPLAY_META: dict[DisplayState, tuple[str, str, str]] = {
 # ============================================================
 
 
-@dataclass
+# Slotted dataclasses where supported (3.10+): long watch sessions keep every
+# PR in memory, and per-instance dicts dominate their size.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class Reviewer:
     login: str
     state: ReviewerState
     commented: bool = False  # has ever commented (orthogonal to state)
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class CICheck:
     name: str
     conclusion: Optional[str]  # SUCCESS, FAILURE, None (still running)
     status: str  # COMPLETED, IN_PROGRESS, QUEUED, etc.
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class PR:
-    """Enriched PR with all derived state."""
+    """Enriched PR with all derived state.
+
+    Holds only what rendering, deploy detection and notification diffing
+    use; the raw API payload is dropped after parsing.
+    """
     number: int
     title: str
     url: str
@@ -152,21 +163,50 @@ class PR:
     human_comment_count: int = 0
     last_human_commenter: str = ""
     last_human_comment_at: str = ""
+    comments_truncated: bool = False  # only the newest comments were fetched
 
-    # Raw data for notification diffing
-    _raw: dict = field(default_factory=dict, repr=False)
+    # Hash of the payload-derived state that notifications compare; set by
+    # parse_pr, 0 when unknown. Deploy state and sources are assigned after
+    # parsing and are compared separately.
+    fingerprint: int = field(default=0, init=False, repr=False, compare=False)
+
+    # Derived once: the ticket whenever the title is set, the display state on
+    # first use after one of its inputs was (see __setattr__)
+    _ticket: Optional[str] = field(init=False, repr=False, compare=False)
+    _display_state: Optional[DisplayState] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        object.__setattr__(self, name, value)
+        if name in _DISPLAY_STATE_INPUTS:
+            object.__setattr__(self, "_display_state", None)
+        elif name == "title":
+            object.__setattr__(self, "_ticket", extract_ticket(value))  # type: ignore[arg-type]
 
     @property
     def display_state(self) -> DisplayState:
         """Derive the single display state from all inputs."""
-        return derive_display_state(self)
+        state = self._display_state
+        if state is None:
+            state = derive_display_state(self)
+            object.__setattr__(self, "_display_state", state)
+        return state
 
     @property
     def ticket(self) -> Optional[str]:
-        """Extract ticket ID from title."""
-        import re
-        m = re.search(r"([A-Z]{2,}-\d+)", self.title, re.IGNORECASE)
-        return m.group(1).upper() if m else None
+        """Ticket ID from the title."""
+        return self._ticket
+
+
+# PR fields derive_display_state reads. Reviewer lists are replaced, never
+# changed in place.
+_DISPLAY_STATE_INPUTS = frozenset({"lifecycle", "deploy", "ci", "review_decision", "reviewers"})
+
+TICKET_RE = re.compile(r"([A-Z]{2,}-\d+)", re.IGNORECASE)
+
+
+def extract_ticket(title: str) -> Optional[str]:
+    m = TICKET_RE.search(title)
+    return m.group(1).upper() if m else None
 
 
 # ============================================================
@@ -242,6 +282,12 @@ def derive_display_state(pr: PR) -> DisplayState:
 # ============================================================
 
 
+# Check conclusions and commit status states that count as failing
+FAILED_CHECK_STATES: frozenset[str] = frozenset({
+    "FAILURE", "ERROR", "TIMED_OUT", "CANCELLED", "ACTION_REQUIRED", "STARTUP_FAILURE",
+})
+
+
 # ============================================================
 # Bot detection
 # ============================================================
@@ -312,21 +358,23 @@ def parse_pr(raw: dict, repo_name: str, sources: Optional[list[str]] = None) ->
     # CI
     ci, ci_failed = parse_ci(raw)
 
-    # Human comments (excludes the PR author's own comments and bots)
+    # Human comments (excludes the PR author's own comments and bots). When
+    # only the newest comments were fetched, the count covers those alone
+    comments = raw.get("comments") or []
     pr_author = (raw.get("author") or {}).get("login", "")
     human_comments = [
-        c for c in (raw.get("comments") or [])
+        c for c in comments
         if not is_bot((c.get("author") or {}).get("login", ""))
         and (c.get("author") or {}).get("login", "") != pr_author
     ]
     human_comments.sort(key=lambda c: c.get("createdAt", ""))
     last_comment = human_comments[-1] if human_comments else None
 
-    return PR(
+    pr = PR(
         number=raw.get("number", 0),
         title=raw.get("title", ""),
         url=raw.get("url", ""),
-        repo=repo_name,
+        repo=sys.intern(repo_name),
         lifecycle=lifecycle,
         review_decision=review_decision,
         merge_readiness=merge_readiness,
@@ -338,12 +386,24 @@ def parse_pr(raw: dict, repo_name: str, sources: Optional[list[str]] = None) ->
         updated_at=raw.get("updatedAt", ""),
         merged_at=raw.get("mergedAt", ""),
         has_conflicts=has_conflicts,
-        sources=list(sources or []),
+        sources=[sys.intern(s) for s in sources or []],
         human_comment_count=len(human_comments),
-        last_human_commenter=(last_comment.get("author") or {}).get("login", "") if last_comment else "",
+        last_human_commenter=sys.intern((last_comment.get("author") or {}).get("login", "")) if last_comment else "",
         last_human_comment_at=last_comment.get("createdAt", "") if last_comment else "",
-        _raw=raw,
+        comments_truncated=raw.get("commentCount", len(comments)) > len(comments),
     )
+    pr.fingerprint = payload_fingerprint(pr)
+    return pr
+
+
+def payload_fingerprint(pr: PR) -> int:
+    """Hash of everything notification diffing looks at, apart from deploy
+    state and sources."""
+    return hash((
+        pr.lifecycle, pr.review_decision, pr.ci, tuple(pr.ci_failed), pr.has_conflicts,
+        tuple(pr.reviewers), pr.human_comment_count, pr.last_human_commenter,
+        pr.last_human_comment_at,
+    )) or 1
 
 
 def parse_reviewers(raw: dict) -> list[Reviewer]:
@@ -397,19 +457,22 @@ def parse_reviewers(raw: dict) -> list[Reviewer]:
         else:
             state = ReviewerState.COMMENTED if has_commented else ReviewerState.PENDING
 
-        result.append(Reviewer(login=login, state=state, commented=has_commented))
+        result.append(Reviewer(login=sys.intern(login), state=state, commented=has_commented))
 
     return result
 
 
 def parse_ci(raw: dict) -> tuple[CIState, list[str]]:
     """Parse CI status from raw PR data."""
+    if "statusCheckState" in raw:
+        return _parse_ci_rollup(raw)
+
     checks = raw.get("statusCheckRollup") or []
     checks = [c for c in checks if c.get("name")]
     if not checks:
         return CIState.NONE, []
 
-    failed = [c["name"] for c in checks if c.get("conclusion") == "FAILURE"]
+    failed = [sys.intern(c["name"]) for c in checks if c.get("conclusion") == "FAILURE"]
     pending = [c for c in checks if c.get("status") not in ("COMPLETED",) and c.get("name")]
 
     if failed:
@@ -417,3 +480,80 @@ def parse_ci(raw: dict) -> tuple[CIState, list[str]]:
     if pending:
         return CIState.PENDING, []
     return CIState.PASS, []
+
+
+def _parse_ci_rollup(raw: dict) -> tuple[CIState, list[str]]:
+    """CI status from the rollup's aggregate state; failing check names come
+    from the sampled contexts, or are summarized if none was sampled."""
+    state = raw.get("statusCheckState")
+    if state in ("FAILURE", "ERROR"):
+        failed = [
+            sys.intern(c.get("name") or c.get("context"))
+            for c in raw.get("statusCheckRollup") or []
+            if (c.get("name") or c.get("context"))
+            and (c.get("conclusion") or c.get("state")) in FAILED_CHECK_STATES
+        ]
+        if not failed:
+            count = raw.get("failingCheckCount") or 0
+            failed = [f"{count} failing" if count else "failing"]
+        return CIState.FAIL, failed
+    if state in ("PENDING", "EXPECTED"):
+        return CIState.PENDING, []
+    if state == "SUCCESS":
+        return CIState.PASS, []
+    return CIState.NONE, []
+
+
+# ============================================================
+# Serialization (daemon socket, persisted snapshots)
+# ============================================================
+
+
+_ENUM_FIELDS: dict[str, type] = {
+    "lifecycle": PRLifecycle,
+    "deploy": DeployState,
+    "review_decision": ReviewDecision,
+    "merge_readiness": MergeReadiness,
+    "ci": CIState,
+}
+
+
+def pr_to_dict(pr: PR) -> dict:
+    """JSON-safe form of a PR: enums by name, reviewers as [login, state, commented]."""
+    data: dict = {}
+    for f in fields(pr):
+        if f.name.startswith("_") or not f.init:
+            continue  # derived caches and the per-process fingerprint
+        value = getattr(pr, f.name)
+        if f.name in _ENUM_FIELDS:
+            value = value.name
+        elif f.name == "reviewers":
+            value = [[r.login, r.state.name, r.commented] for r in value]
+        elif isinstance(value, list):
+            value = list(value)
+        data[f.name] = value
+    return data
+
+
+def pr_from_dict(data: dict) -> PR:
+    """Inverse of pr_to_dict. Unknown keys are ignored, missing ones default."""
+    kwargs: dict = {}
+    for f in fields(PR):
+        if not f.init or f.name not in data:
+            continue
+        value = data[f.name]
+        if f.name in _ENUM_FIELDS:
+            value = _ENUM_FIELDS[f.name][value]
+        elif f.name == "reviewers":
+            value = [
+                Reviewer(sys.intern(login), ReviewerState[state], commented)
+                for login, state, commented in value
+            ]
+        elif f.name == "repo":
+            value = sys.intern(value)
+        elif f.name == "sources":
+            value = [sys.intern(s) for s in value]
+        kwargs[f.name] = value
+    pr = PR(**kwargs)
+    pr.fingerprint = payload_fingerprint(pr)  # hash() is salted per process
+    return pr
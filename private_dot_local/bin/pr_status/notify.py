@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import shutil
 import subprocess
+from dataclasses import dataclass, replace
 from typing import Optional
 
 from .model import (
@@ -38,88 +39,183 @@ def _short_title(pr: PR) -> str:
     return title
 
 
-def diff_and_notify(old_prs: list[PR], new_prs: list[PR]) -> None:
-    """Compare two snapshots and send notifications on meaningful changes."""
-    old_by_key = {(p.repo, p.number): p for p in old_prs}
-    new_by_key = {(p.repo, p.number): p for p in new_prs}
+# (payload fingerprint, deploy state, sources) per PR, taken when a snapshot
+# is made: deploy state and sources are updated in place on PR objects that
+# the previous snapshot may share.
+StateMark = tuple
 
-    changes: list[str] = []
 
-    for key, new_pr in new_by_key.items():
-        old_pr = old_by_key.get(key)
-        title = _short_title(new_pr)
+def state_marks(prs: list[PR]) -> dict[tuple[str, int], StateMark]:
+    return {(p.repo, p.number): (p.fingerprint, p.deploy, tuple(p.sources)) for p in prs}
+
+
+@dataclass(frozen=True)
+class Event:
+    """One notification-worthy change to a PR."""
+    kind: str  # see EVENT_FORMATS
+    repo: str
+    number: int
+    url: str
+    title: str  # ticket stripped, shortened
+    actor: str = ""  # reviewer or commenter
+    detail: str = ""  # failing checks
+    count: int = 0  # new comments, 0 when unknown
+
+    @property
+    def message(self) -> str:
+        label = "new comments"
+        if self.count:
+            label = f"{self.count} comment" + ("s" if self.count != 1 else "")
+        return EVENT_FORMATS[self.kind].format(
+            title=self.title, actor=self.actor or "Someone", detail=self.detail, comments=label,
+        )
 
-        if not old_pr:
-            if "review_requested" in set(new_pr.sources):
-                changes.append(f"👀 Review requested: {title}")
+
+EVENT_FORMATS = {
+    "review_requested": "👀 Review requested: {title}",
+    "merged": "✅ Merged: {title}",
+    "closed": "🚫 Closed: {title}",
+    "ci_failed": "❌ CI failed ({detail}): {title}",
+    "ci_fixed": "🟢 CI fixed: {title}",
+    "deployed_prod": "🚀 Deployed to prod: {title}",
+    "deployed_preprod": "⬆️ Deployed to preprod: {title}",
+    "conflicts": "🔀 Conflicts: {title}",
+    "conflicts_resolved": "✅ Conflicts resolved: {title}",
+    "comments": "💬 {actor} left {comments}: {title}",
+    "approved": "✅ {actor} approved: {title}",
+    "changes_requested": "🔴 {actor} requested changes: {title}",
+    "review_dismissed": "♻️ {actor} review dismissed: {title}",
+    "commented": "💬 {actor} commented: {title}",
+}
+
+
+def diff_events(
+    old_prs: list[PR],
+    new_prs: list[PR],
+    old_marks: Optional[dict[tuple[str, int], StateMark]] = None,
+) -> list[Event]:
+    """Changes between two snapshots, in snapshot order.
+
+    `old_marks` (from state_marks when the old snapshot was taken) lets PRs
+    whose fingerprint, deploy state and sources are unchanged be skipped
+    without looking further; without it they are recomputed from `old_prs`.
+    """
+    if old_marks is None:
+        old_marks = state_marks(old_prs)
+    old_by_key: Optional[dict[tuple[str, int], PR]] = None
+    events: list[Event] = []
+
+    for new_pr in new_prs:
+        key = (new_pr.repo, new_pr.number)
+        mark = old_marks.get(key)
+        if mark is None:
+            if "review_requested" in new_pr.sources:
+                events.append(_event("review_requested", new_pr))
+            continue
+        if new_pr.fingerprint and mark == (new_pr.fingerprint, new_pr.deploy, tuple(new_pr.sources)):
             continue
 
-        old_sources = set(old_pr.sources)
-        new_sources = set(new_pr.sources)
-        if "review_requested" in new_sources and "review_requested" not in old_sources:
-            changes.append(f"👀 Review requested: {title}")
-
-        old_ds = old_pr.display_state
-        new_ds = new_pr.display_state
-
-        # ---- Aggregate state transitions ----
-
-        if old_ds != new_ds:
-            # PR merged or closed
-            if new_pr.lifecycle == PRLifecycle.MERGED and old_pr.lifecycle != PRLifecycle.MERGED:
-                changes.append(f"✅ Merged: {title}")
-                continue
-            if new_pr.lifecycle == PRLifecycle.CLOSED and old_pr.lifecycle != PRLifecycle.CLOSED:
-                changes.append(f"🚫 Closed: {title}")
-                continue
-
-            # CI state transitions
-            if new_pr.ci == CIState.FAIL and old_pr.ci != CIState.FAIL:
-                names = ", ".join(new_pr.ci_failed[:2])
-                changes.append(f"❌ CI failed ({names}): {title}")
-            elif old_pr.ci == CIState.FAIL and new_pr.ci != CIState.FAIL:
-                changes.append(f"🟢 CI fixed: {title}")
-
-            # Deploy transitions
-            if new_ds == DisplayState.PROD and old_ds != DisplayState.PROD:
-                changes.append(f"🚀 Deployed to prod: {title}")
-            elif new_ds == DisplayState.PREPROD and old_ds not in (DisplayState.PROD, DisplayState.PREPROD):
-                changes.append(f"⬆️ Deployed to preprod: {title}")
-
-        # Conflicts are orthogonal to the display state
-        if not old_pr.has_conflicts and new_pr.has_conflicts:
-            changes.append(f"🔀 Conflicts: {title}")
-        elif old_pr.has_conflicts and not new_pr.has_conflicts:
-            changes.append(f"✅ Conflicts resolved: {title}")
-
-        # ---- New human comments on authored PRs ----
-
-        authored = "authored_open" in set(new_pr.sources) or "authored_merged" in set(new_pr.sources)
-        if authored and new_pr.human_comment_count > old_pr.human_comment_count:
-            commenter = new_pr.last_human_commenter or "Someone"
-            n = new_pr.human_comment_count - old_pr.human_comment_count
-            label = f"{n} comment" + ("s" if n != 1 else "")
-            changes.append(f"💬 {commenter} left {label}: {title}")
-
-        # ---- Individual reviewer events (even if aggregate state unchanged) ----
-
-        if new_pr.lifecycle not in (PRLifecycle.OPEN, PRLifecycle.DRAFT):
+        if old_by_key is None:
+            old_by_key = {(p.repo, p.number): p for p in old_prs}
+        old_pr = old_by_key.get(key)
+        if old_pr is None:
+            continue
+        # The old PR object may have been updated in place since; restore
+        # what it looked like when the old snapshot was taken
+        old_deploy, old_sources = mark[1], list(mark[2])
+        if old_pr.deploy != old_deploy or old_pr.sources != old_sources:
+            old_pr = replace(old_pr, deploy=old_deploy, sources=old_sources)
+        events.extend(_pr_events(old_pr, new_pr))
+    return events
+
+
+def _event(kind: str, pr: PR, **kwargs) -> Event:
+    return Event(kind, pr.repo, pr.number, pr.url, _short_title(pr), **kwargs)
+
+
+def _pr_events(old_pr: PR, new_pr: PR) -> list[Event]:
+    events: list[Event] = []
+
+    old_sources = set(old_pr.sources)
+    new_sources = set(new_pr.sources)
+    if "review_requested" in new_sources and "review_requested" not in old_sources:
+        events.append(_event("review_requested", new_pr))
+
+    old_ds = old_pr.display_state
+    new_ds = new_pr.display_state
+
+    # ---- Aggregate state transitions ----
+
+    if old_ds != new_ds:
+        # PR merged or closed
+        if new_pr.lifecycle == PRLifecycle.MERGED and old_pr.lifecycle != PRLifecycle.MERGED:
+            events.append(_event("merged", new_pr))
+            return events
+        if new_pr.lifecycle == PRLifecycle.CLOSED and old_pr.lifecycle != PRLifecycle.CLOSED:
+            events.append(_event("closed", new_pr))
+            return events
+
+        # CI state transitions
+        if new_pr.ci == CIState.FAIL and old_pr.ci != CIState.FAIL:
+            events.append(_event("ci_failed", new_pr, detail=", ".join(new_pr.ci_failed[:2])))
+        elif old_pr.ci == CIState.FAIL and new_pr.ci != CIState.FAIL:
+            events.append(_event("ci_fixed", new_pr))
+
+        # Deploy transitions
+        if new_ds == DisplayState.PROD and old_ds != DisplayState.PROD:
+            events.append(_event("deployed_prod", new_pr))
+        elif new_ds == DisplayState.PREPROD and old_ds not in (DisplayState.PROD, DisplayState.PREPROD):
+            events.append(_event("deployed_preprod", new_pr))
+
+    # Conflicts are orthogonal to the display state
+    if not old_pr.has_conflicts and new_pr.has_conflicts:
+        events.append(_event("conflicts", new_pr))
+    elif old_pr.has_conflicts and not new_pr.has_conflicts:
+        events.append(_event("conflicts_resolved", new_pr))
+
+    # ---- New human comments on authored open PRs ----
+
+    # Merged and closed PRs are fetched without comments. A newer human
+    # comment is what makes it news; how many there are is only known while
+    # every comment was fetched.
+    if "authored_open" in new_sources and new_pr.last_human_comment_at > old_pr.last_human_comment_at:
+        count = 0
+        if not new_pr.comments_truncated and not old_pr.comments_truncated:
+            count = max(0, new_pr.human_comment_count - old_pr.human_comment_count)
+        events.append(_event("comments", new_pr, actor=new_pr.last_human_commenter, count=count))
+
+    # ---- Individual reviewer events (even if aggregate state unchanged) ----
+
+    if new_pr.lifecycle not in (PRLifecycle.OPEN, PRLifecycle.DRAFT):
+        return events
+
+    old_reviewers = {r.login: r.state for r in old_pr.reviewers}
+    for r in new_pr.reviewers:
+        old_state = old_reviewers.get(r.login)
+        if old_state == r.state:
             continue
 
-        old_reviewers = {r.login: r.state for r in old_pr.reviewers}
-        for r in new_pr.reviewers:
-            old_state = old_reviewers.get(r.login)
-            if old_state == r.state:
-                continue
-
-            if r.state == ReviewerState.APPROVED and old_state != ReviewerState.APPROVED:
-                changes.append(f"✅ {r.login} approved: {title}")
-            elif r.state == ReviewerState.CHANGES_REQUESTED and old_state != ReviewerState.CHANGES_REQUESTED:
-                changes.append(f"🔴 {r.login} requested changes: {title}")
-            elif r.state == ReviewerState.STALE and old_state != ReviewerState.STALE:
-                changes.append(f"♻️ {r.login} review dismissed: {title}")
-            elif r.state == ReviewerState.COMMENTED and old_state not in (ReviewerState.COMMENTED, None):
-                changes.append(f"💬 {r.login} commented: {title}")
-
-    if changes:
-        send_notification("pr-status", "\n".join(changes[:5]))
+        if r.state == ReviewerState.APPROVED and old_state != ReviewerState.APPROVED:
+            events.append(_event("approved", new_pr, actor=r.login))
+        elif r.state == ReviewerState.CHANGES_REQUESTED and old_state != ReviewerState.CHANGES_REQUESTED:
+            events.append(_event("changes_requested", new_pr, actor=r.login))
+        elif r.state == ReviewerState.STALE and old_state != ReviewerState.STALE:
+            events.append(_event("review_dismissed", new_pr, actor=r.login))
+        elif r.state == ReviewerState.COMMENTED and old_state not in (ReviewerState.COMMENTED, None):
+            events.append(_event("commented", new_pr, actor=r.login))
+    return events
+
+
+def diff_and_notify(
+    old_prs: list[PR],
+    new_prs: list[PR],
+    old_marks: Optional[dict[tuple[str, int], StateMark]] = None,
+) -> list[Event]:
+    """Compare two snapshots and send notifications on meaningful changes.
+
+    Returns the events, for other outputs to consume.
+    """
+    events = diff_events(old_prs, new_prs, old_marks)
+    if events:
+        send_notification("pr-status", "\n".join(e.message for e in events[:5]))
+    return events
@@ -6,6 +6,8 @@ import re
 import shutil
 import sys
 from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
 
 from .discover import Repo
 from .model import (
@@ -77,13 +79,74 @@ def render_reviewer(r) -> str:
     return " ".join(icons) + " " + r.login
 
 
+@dataclass(frozen=True)
+class PRPieces:
+    """The width-independent parts of one PR's rendering."""
+    title: str  # ticket stripped
+    ticket: Optional[str]
+    emoji: str
+    label: str
+    ansi: str
+    detail: str  # conflicts, reviewers, CI; ANSI for the terminal, plain for Slack
+    detail_plain: str
+    link: str  # OSC 8 "#N" hyperlink
+
+
+# (repo, number, slack) -> (fingerprint, pieces). Relayout on resize or an
+# unchanged PR next cycle reuses the pieces; only the width-dependent
+# truncation and padding run again.
+_pieces_cache: dict[tuple[str, int, bool], tuple[tuple, PRPieces]] = {}
+PIECES_CACHE_MAX = 5000
+
+
+def pr_pieces(pr: PR, slack: bool) -> PRPieces:
+    ds = pr.display_state
+    fingerprint = (
+        pr.title, pr.url, ds, pr.has_conflicts, tuple(pr.reviewers), pr.ci, tuple(pr.ci_failed[:2]),
+    )
+    key = (pr.repo, pr.number, slack)
+    cached = _pieces_cache.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    emoji, label, ansi = DISPLAY_META[ds]
+    detail_parts: list[str] = []
+    if pr.has_conflicts and not slack:
+        detail_parts.append(f"{RED}🔀 conflicts{NC}")
+    if pr.reviewers:
+        reviewer_strs = [render_reviewer(r) for r in pr.reviewers]
+        detail_parts.append("  ".join(strip_formatting(s) if slack else s for s in reviewer_strs))
+    if pr.ci == CIState.FAIL:
+        names = ", ".join(pr.ci_failed[:2])
+        detail_parts.append(f"CI: {names}" if slack else f"{RED}CI:{NC} {names}")
+    elif pr.ci == CIState.PENDING:
+        detail_parts.append("CI pending" if slack else f"{YELLOW}CI pending{NC}")
+    detail = "  ".join(detail_parts)
+
+    pieces = PRPieces(
+        title=strip_ticket(pr.title),
+        ticket=pr.ticket,
+        emoji=emoji,
+        label=label,
+        ansi=ansi,
+        detail=detail,
+        detail_plain=strip_formatting(detail),
+        link=osc8(pr.url, f"#{pr.number}"),
+    )
+    if len(_pieces_cache) >= PIECES_CACHE_MAX:
+        _pieces_cache.clear()
+    _pieces_cache[key] = (fingerprint, pieces)
+    return pieces
+
+
 def render(
     all_prs: list[PR],
     repos: list[Repo],
     slack: bool,
+    width: Optional[int] = None,
 ) -> list[str]:
     lines: list[str] = []
-    width = current_terminal_width(slack)
+    width = width or current_terminal_width(slack)
     repo_short = {r.owner_repo: r.short_name or r.name for r in repos}
     repo_color = {r.owner_repo: r.color for r in repos}
     repo_order = {r.owner_repo: i for i, r in enumerate(sorted(repos, key=lambda r: r.owner_repo))}
@@ -127,9 +190,11 @@ def render(
     groups: OrderedDict[str, list[PR]] = OrderedDict()
     ungrouped: list[PR] = []
     active = [pr for pr in all_prs if pr.lifecycle != PRLifecycle.CLOSED]
+    pieces = {id(pr): pr_pieces(pr, slack) for pr in active}
     for pr in active:
-        if pr.ticket:
-            groups.setdefault(pr.ticket, []).append(pr)
+        ticket = pieces[id(pr)].ticket
+        if ticket:
+            groups.setdefault(ticket, []).append(pr)
         else:
             ungrouped.append(pr)
 
@@ -149,35 +214,22 @@ def render(
     def render_pr(pr: PR) -> list[str]:
         short = repo_text(repo_short.get(pr.repo, pr.repo.split("/", 1)[-1]))
         color = repo_color.get(pr.repo, "")
-        title = strip_ticket(pr.title)
-        ds = pr.display_state
-        emoji, label, ansi = DISPLAY_META[ds]
-        padded = status_text(label).ljust(label_width)
+        p = pieces[id(pr)]
+        title = p.title
+        emoji = p.emoji
+        padded = status_text(p.label).ljust(label_width)
         repo_pad = short.ljust(repo_width)
 
-        detail_parts: list[str] = []
-        if pr.has_conflicts and not slack:
-            detail_parts.append(f"{RED}🔀 conflicts{NC}")
-        if pr.reviewers:
-            reviewer_strs = [render_reviewer(r) for r in pr.reviewers]
-            detail_parts.append("  ".join(strip_formatting(s) if slack else s for s in reviewer_strs))
-        if pr.ci == CIState.FAIL:
-            names = ", ".join(pr.ci_failed[:2])
-            detail_parts.append(f"CI: {names}" if slack else f"{RED}CI:{NC} {names}")
-        elif pr.ci == CIState.PENDING:
-            detail_parts.append("CI pending" if slack else f"{YELLOW}CI pending{NC}")
-        detail = "  ".join(detail_parts)
-
         if slack:
             line = f"{emoji} `{padded}| {repo_pad}|`  {title}  [#{pr.number}]({pr.url})"
-            if detail:
-                line += f"  {strip_formatting(detail)}"
+            if p.detail:
+                line += f"  {p.detail_plain}"
             return [line]
 
-        pr_link = osc8(pr.url, f"#{pr.number}")
-        term_status = f"\033[{ansi}m{emoji} {padded}{NC}"
+        pr_link = p.link
+        term_status = f"\033[{p.ansi}m{emoji} {padded}{NC}"
         meta = f"  {term_status}  {color}{repo_pad}{NC}  {pr_link}"
-        detail_plain = strip_formatting(detail)
+        detail_plain = p.detail_plain
 
         if width < 72:
             indent = "      " if width >= 52 else "    "
@@ -188,7 +240,11 @@ def render(
 
         base_prefix = f"  {term_status}  {color}{repo_pad}{NC}  "
         base_suffix = f"  {pr_link}"
-        available = width - visible_len(base_prefix) - visible_len(base_suffix)
+        # Visible widths without regex passes: the prefix is emoji, label and
+        # repo plus fixed spacing, the suffix is "  #N"
+        prefix_len = 2 + len(emoji) + 1 + len(padded) + 2 + len(repo_pad) + 2
+        suffix_len = 3 + len(str(pr.number))
+        available = width - prefix_len - suffix_len
         if width < 96:
             out = [f"{base_prefix}{DIM}{truncate_text(title, max(16, available))}{NC}{base_suffix}"]
             if detail_plain:
@@ -233,7 +289,7 @@ def render(
         prs.sort(key=lambda p: (repo_order.get(p.repo, 99), 0 if p.lifecycle in (PRLifecycle.OPEN, PRLifecycle.DRAFT) else 1))
         top_repo = prs[0].repo
         top_prs = sorted([p for p in prs if p.repo == top_repo], key=lambda p: p.created_at or p.merged_at)
-        lines.extend(render_header(ticket, strip_ticket(top_prs[0].title)))
+        lines.extend(render_header(ticket, pieces[id(top_prs[0])].title))
         if all_prod(prs):
             lines.append(render_collapsed(prs))
         else:
@@ -0,0 +1,302 @@
+"""Record/replay of GitHub traffic for offline end-to-end benchmarks.
+
+Record a cold run against live GitHub (no on-disk caches):
+    python -m pr_status.replay record DIR [--author USER] [--days N] [--no-deploy]
+
+Replay it offline, timing the whole discover → enrich → deploy → render cycle:
+    python -m pr_status.replay bench DIR [--latency MS|recorded] [--jitter MS]
+        [--fail-rate P] [--concurrency 1,4,8] [--repeat N]
+
+Every API request the transport sends and every command `util.run` executes
+(git, and `gh` when there is no token) is appended to DIR/calls.jsonl with its
+response and how long it took. Replay serves them back through a
+ReplayTransport and a replay runner; repeated identical calls are answered in
+recorded order. Injected failures look like dropped connections (None) for
+HTTP and failed commands for `run`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from . import transport as transport_mod
+from . import util
+from .cache import RepoMetaCache
+from .cycle import run_once
+from .governor import Governor, get_governor, set_governor
+from .transport import Response, Transport, using_transport
+
+CALLS_FILE = "calls.jsonl"
+META_FILE = "meta.json"
+
+
+def _http_key(method: str, url: str, body: Optional[bytes]) -> str:
+    digest = hashlib.sha1(body or b"").hexdigest()
+    return f"{method} {url} {digest}"
+
+
+def _run_key(cmd: list[str], env: Optional[dict]) -> str:
+    return json.dumps([cmd, (env or {}).get("GIT_DIR", "")])
+
+
+class Recorder:
+    """Appends calls to DIR/calls.jsonl as they complete."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        root.mkdir(parents=True, exist_ok=True)
+        self._file = open(root / CALLS_FILE, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def runner(self, cmd: list[str], env: Optional[dict], timeout: int) -> Optional[str]:
+        t0 = time.monotonic()
+        out = util.run_subprocess(cmd, env, timeout)
+        self.add({
+            "kind": "run", "key": _run_key(cmd, env), "stdout": out,
+            "elapsed": time.monotonic() - t0,
+        })
+        return out
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class RecordingTransport(Transport):
+    def __init__(self, recorder: Recorder, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+
+    def _send(
+        self, method: str, url: str, body: Optional[bytes], hdrs: dict[str, str],
+    ) -> Optional[Response]:
+        t0 = time.monotonic()
+        resp = super()._send(method, url, body, hdrs)
+        self.recorder.add({
+            "kind": "http", "key": _http_key(method, url, body),
+            "status": resp.status if resp else None,
+            "headers": resp.headers if resp else {},
+            "body": resp.body.decode("utf-8", "replace") if resp else "",
+            "elapsed": time.monotonic() - t0,
+        })
+        return resp
+
+
+class Fixture:
+    """Recorded calls by key, served in recorded order (the last one repeats)."""
+
+    def __init__(self, root: Path) -> None:
+        self.calls: dict[str, list[dict]] = defaultdict(list)
+        with open(root / CALLS_FILE, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self.calls[entry["key"]].append(entry)
+        self._next: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.misses: list[str] = []
+
+    def take(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entries = self.calls.get(key)
+            if not entries:
+                self.misses.append(key)
+                return None
+            i = self._next[key]
+            self._next[key] = i + 1
+            return entries[min(i, len(entries) - 1)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._next.clear()
+            self.misses.clear()
+
+
+class Faults:
+    """Per-call latency and failure injection, reproducible from a seed."""
+
+    def __init__(
+        self,
+        latency: Optional[float] = 0.0,  # seconds; None replays recorded timings
+        jitter: float = 0.0,
+        fail_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def apply(self, entry: Optional[dict]) -> bool:
+        """Sleep for the call's latency; False if this call should fail."""
+        with self._lock:
+            self.calls += 1
+            delay = (entry or {}).get("elapsed", 0.0) if self.latency is None else self.latency
+            delay += self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.fail_rate
+            if fail:
+                self.failures += 1
+        if delay > 0:
+            time.sleep(delay)
+        return not fail
+
+
+class ReplayTransport(Transport):
+    """A transport answering from a Fixture instead of the network."""
+
+    def __init__(self, fixture: Fixture, faults: Faults) -> None:
+        super().__init__("http://replay.invalid")
+        self.fixture = fixture
+        self.faults = faults
+
+    def _send(
+        self, method: str, url: str, body: Optional[bytes], hdrs: dict[str, str],
+    ) -> Optional[Response]:
+        entry = self.fixture.take(_http_key(method, url, body))
+        if not self.faults.apply(entry):
+            return None
+        if entry is None:
+            return Response(404, {}, b'{"message": "not recorded"}')
+        if entry["status"] is None:
+            return None
+        return Response(entry["status"], entry["headers"], entry["body"].encode("utf-8"))
+
+
+def replay_runner(fixture: Fixture, faults: Faults):
+    def runner(cmd: list[str], env: Optional[dict], timeout: int) -> Optional[str]:
+        entry = fixture.take(_run_key(cmd, env))
+        if not faults.apply(entry) or entry is None:
+            return None
+        return entry["stdout"]
+    return runner
+
+
+# ============================================================
+# Commands
+# ============================================================
+
+
+def record(
+    root: Path,
+    author: str,
+    days: int,
+    check_deploy: bool,
+    api_url: Optional[str] = None,
+) -> None:
+    """Run one cold cycle against the API and record it. Without a token or
+    an explicit `api_url`, the `gh` commands are recorded instead."""
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    recorder = Recorder(root)
+    token = transport_mod._read_token()
+    transport = (
+        RecordingTransport(recorder, api_url or transport_mod._api_url(), token)
+        if token or api_url else None
+    )
+    util.set_runner(recorder.runner)
+    try:
+        with using_transport(transport):
+            snapshot, _ = run_once(
+                author, since, check_deploy, False, {}, repo_meta=RepoMetaCache(None),
+            )
+    finally:
+        util.set_runner(None)
+        recorder.close()
+    (root / META_FILE).write_text(json.dumps(
+        {"author": author, "since": since, "deploy": check_deploy, "prs": len(snapshot.prs)},
+    ))
+    print(f"Recorded {len(snapshot.prs)} PRs to {root}", file=sys.stderr)
+
+
+def replay_once(root: Path, faults: Faults, fixture: Optional[Fixture] = None):
+    """One cold run_once against the recording. Returns (snapshot, lines, fixture)."""
+    meta = json.loads((root / META_FILE).read_text())
+    fixture = fixture or Fixture(root)
+    fixture.reset()
+    util.set_runner(replay_runner(fixture, faults))
+    try:
+        with using_transport(ReplayTransport(fixture, faults)):
+            snapshot, lines = run_once(
+                meta["author"], meta["since"], meta["deploy"], False, {},
+                quiet=True, repo_meta=RepoMetaCache(None),
+            )
+    finally:
+        util.set_runner(None)
+    return snapshot, lines, fixture
+
+
+def bench(
+    root: Path,
+    latency: Optional[float],
+    jitter: float,
+    fail_rate: float,
+    concurrency: list[int],
+    repeat: int,
+) -> None:
+    fixture = Fixture(root)
+    saved = get_governor()
+    print(f"{'concurrency':>11} {'best s':>8} {'calls':>6} {'failed':>6} {'PRs':>5} {'misses':>6}")
+    try:
+        for workers in concurrency:
+            best = float("inf")
+            for i in range(repeat):
+                # Fresh, unthrottled governor: we measure the pipeline, not pacing
+                set_governor(Governor(rate=1e6, burst=10 ** 6, max_concurrency=workers))
+                faults = Faults(latency, jitter, fail_rate, seed=i)
+                t0 = time.perf_counter()
+                snapshot, _, _ = replay_once(root, faults, fixture)
+                best = min(best, time.perf_counter() - t0)
+            print(
+                f"{workers:>11} {best:>8.3f} {faults.calls:>6} {faults.failures:>6}"
+                f" {len(snapshot.prs):>5} {len(set(fixture.misses)):>6}"
+            )
+    finally:
+        set_governor(saved)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m pr_status.replay")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record")
+    rec.add_argument("dir", type=Path)
+    rec.add_argument("--author", default="@me")
+    rec.add_argument("--days", type=int, default=30)
+    rec.add_argument("--no-deploy", dest="deploy", action="store_false", default=True)
+
+    ben = sub.add_parser("bench")
+    ben.add_argument("dir", type=Path)
+    ben.add_argument("--latency", default="0", help="per-call latency in ms, or 'recorded'")
+    ben.add_argument("--jitter", type=float, default=0, metavar="MS")
+    ben.add_argument("--fail-rate", type=float, default=0)
+    ben.add_argument("--concurrency", default="1,4,8")
+    ben.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.dir, args.author, args.days, args.deploy)
+    else:
+        latency = None if args.latency == "recorded" else float(args.latency) / 1000
+        bench(
+            args.dir, latency, args.jitter / 1000, args.fail_rate,
+            [int(c) for c in args.concurrency.split(",") if c], args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
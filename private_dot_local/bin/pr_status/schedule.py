@@ -0,0 +1,248 @@
+"""Adaptive refresh scheduling for --watch.
+
+Discovery (the search buckets) runs every `--watch` seconds and picks up any PR
+whose updatedAt moved. On top of that, each PR and each repo with merged PRs
+gets its own refresh interval from how likely it is to change soon: CI
+running, reviews pending, or a deploy in flight are polled within seconds,
+while settled PRs are left to discovery. Scheduled refreshes share a
+requests-per-minute budget; when more is due than the budget allows, the most
+overdue items go first.
+
+With a webhook receiver, changes are pushed instead: `push` makes the touched
+items due at once, and `set_interval_scale` stretches the regular intervals
+while deliveries keep arriving.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from .deploy import DEPLOY_BATCH_SIZE
+from .fetch import BATCH_SIZE
+from .model import CIState, DeployState, DisplayState, PR, PRLifecycle
+
+# Refresh intervals in seconds
+HOT = 15
+WARM = 60
+COOL = 300
+COLD = 1800
+
+# Scheduled refresh requests allowed per minute (discovery not included)
+DEFAULT_BUDGET = 20
+
+
+def _age_seconds(timestamp: str, now: datetime) -> float:
+    try:
+        then = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return math.inf
+    return (now - then).total_seconds()
+
+
+def pr_interval(pr: PR, now: Optional[datetime] = None) -> float:
+    """How often a PR's details are worth re-fetching."""
+    now = now or datetime.now(timezone.utc)
+    if pr.lifecycle in (PRLifecycle.MERGED, PRLifecycle.CLOSED):
+        return COLD  # deploy progress is tracked per repo
+    if pr.ci == CIState.PENDING:
+        return HOT
+    age = _age_seconds(pr.updated_at, now)
+    if pr.lifecycle == PRLifecycle.DRAFT and age > 7 * 86400:
+        return COLD
+    if pr.display_state == DisplayState.REVIEW or "review_requested" in pr.sources:
+        return WARM
+    if age < 3600:
+        return WARM
+    return COOL if age < 86400 else COLD
+
+
+def repo_interval(merged: list[PR]) -> float:
+    """How often a repo's deploy state is worth re-checking."""
+    if any(pr.deploy != DeployState.PROD for pr in merged):
+        return WARM  # something is on its way out
+    return COLD
+
+
+class Scheduler:
+    """Tracks when each PR, each repo and discovery are next due."""
+
+    def __init__(
+        self,
+        discovery_interval: float,
+        budget_per_minute: int = DEFAULT_BUDGET,
+        track_deploys: bool = True,
+        clock=time.monotonic,
+        interval_scale: float = 1.0,
+    ) -> None:
+        self.discovery_interval = discovery_interval
+        self.track_deploys = track_deploys
+        self.budget_per_minute = budget_per_minute
+        self.clock = clock
+        self.interval_scale = interval_scale
+        self.next_discovery = 0.0
+        self.pr_due: dict[tuple[str, int], float] = {}
+        self.pr_every: dict[tuple[str, int], float] = {}
+        self.repo_due: dict[str, float] = {}
+        self.repo_every: dict[str, float] = {}
+        self.repo_checked: dict[str, set[tuple[str, int]]] = {}  # PRs covered by the last check
+        self._tokens = float(budget_per_minute)
+        self._refilled = clock()
+
+    # ---- bookkeeping ----
+
+    def observe(self, prs: list[PR]) -> None:
+        """(Re)assign intervals after a discovery cycle or a refresh.
+
+        An item whose interval shrank is pulled forward; items that are gone
+        are forgotten.
+        """
+        now = self.clock()
+        keys = set()
+        merged_by_repo: dict[str, list[PR]] = {}
+        for pr in prs:
+            key = (pr.repo, pr.number)
+            keys.add(key)
+            every = pr_interval(pr) * self.interval_scale
+            self.pr_every[key] = every
+            self.pr_due[key] = min(self.pr_due.get(key, now + every), now + every)
+            if (
+                self.track_deploys
+                and pr.lifecycle == PRLifecycle.MERGED
+                and "authored_merged" in pr.sources
+            ):
+                merged_by_repo.setdefault(pr.repo, []).append(pr)
+
+        for key in set(self.pr_due) - keys:
+            del self.pr_due[key], self.pr_every[key]
+
+        for repo, merged in merged_by_repo.items():
+            every = repo_interval(merged) * self.interval_scale
+            self.repo_every[repo] = every
+            self.repo_due[repo] = min(self.repo_due.get(repo, now), now + every)
+        for repo in set(self.repo_due) - set(merged_by_repo):
+            del self.repo_due[repo], self.repo_every[repo]
+            self.repo_checked.pop(repo, None)
+
+    def discovered(self) -> None:
+        self.next_discovery = self.clock() + self.discovery_interval * self.interval_scale
+
+    def set_interval_scale(self, scale: float) -> None:
+        """Stretch (or restore) every interval. Items already scheduled are
+        pulled forward if their new interval ends sooner."""
+        if scale == self.interval_scale:
+            return
+        now = self.clock()
+        ratio = scale / self.interval_scale
+        self.interval_scale = scale
+        for key in self.pr_every:
+            self.pr_every[key] *= ratio
+            self.pr_due[key] = min(self.pr_due[key], now + self.pr_every[key])
+        for repo in self.repo_every:
+            self.repo_every[repo] *= ratio
+            self.repo_due[repo] = min(self.repo_due[repo], now + self.repo_every[repo])
+        self.next_discovery = min(self.next_discovery, now + self.discovery_interval * scale)
+
+    def forget(self) -> None:
+        """Drop PR and repo schedules, e.g. when the snapshot they refresh
+        is lost; the next discovery cycle hands intervals out again."""
+        self.pr_due.clear()
+        self.pr_every.clear()
+        self.repo_due.clear()
+        self.repo_every.clear()
+        self.repo_checked.clear()
+
+    def refreshed(self, keys: list[tuple[str, int]], repos: list[str], prs: list[PR]) -> None:
+        now = self.clock()
+        for key in keys:
+            if key in self.pr_every:
+                self.pr_due[key] = now + self.pr_every[key]
+        for repo in repos:
+            self.repo_due[repo] = now + self.repo_every.get(repo, WARM)
+            self.repo_checked[repo] = {(p.repo, p.number) for p in prs if p.repo == repo}
+
+    def push(self, keys: list[tuple[str, int]], repos: list[str], discover: bool = False) -> None:
+        """Make PRs and repos due now because something changed them, and
+        discovery too if there may be PRs we aren't tracking yet."""
+        now = self.clock()
+        for key in keys:
+            if key in self.pr_due:
+                self.pr_due[key] = now
+        for repo in repos:
+            if repo in self.repo_due:
+                self.repo_due[repo] = now
+        if discover:
+            self.next_discovery = now
+
+    # ---- queries ----
+
+    def discovery_due(self) -> bool:
+        return self.clock() >= self.next_discovery
+
+    def repo_needs_check(self, repo: str, prs: list[PR]) -> bool:
+        """Whether a discovery cycle should re-check a repo's deploys: it is
+        due, or it has merged PRs its last check didn't cover."""
+        keys = {(p.repo, p.number) for p in prs}
+        if not keys <= self.repo_checked.get(repo, set()):
+            return True
+        return self.clock() >= self.repo_due.get(repo, 0)
+
+    def plan(self) -> tuple[list[tuple[str, int]], list[str]]:
+        """PRs and repos to refresh now, most overdue first, within budget.
+
+        Items due at about the same time as the next discovery are left to it.
+        """
+        now = self.clock()
+        self._refill(now)
+        horizon = self.next_discovery - HOT
+        due = sorted(
+            [(t, "pr", key) for key, t in self.pr_due.items() if t <= now and t < horizon]
+            + [(t, "repo", repo) for repo, t in self.repo_due.items() if t <= now and t < horizon],
+            key=lambda item: item[0],
+        )
+
+        keys: list[tuple[str, int]] = []
+        repos: list[str] = []
+        for _, kind, item in due:
+            more_keys = keys + [item] if kind == "pr" else keys
+            more_repos = repos + [item] if kind == "repo" else repos
+            if self._cost(more_keys, more_repos) > self._tokens:
+                break
+            keys, repos = more_keys, more_repos
+
+        self._tokens -= self._cost(keys, repos)
+        return keys, repos
+
+    def next_wakeup(self) -> float:
+        """Seconds until something is due (discovery included).
+
+        Refreshes that are due but over budget count from when the budget
+        affords one again.
+        """
+        now = self.clock()
+        self._refill(now)
+        horizon = self.next_discovery - HOT
+        upcoming = [self.next_discovery]
+        if self.budget_per_minute > 0:
+            affordable = now + max(0.0, 1 - self._tokens) * 60 / self.budget_per_minute
+            upcoming += [
+                max(due, affordable)
+                for due in [*self.pr_due.values(), *self.repo_due.values()] if due < horizon
+            ]
+        return max(0.0, min(upcoming) - now)
+
+    # ---- budget ----
+
+    @staticmethod
+    def _cost(keys: list[tuple[str, int]], repos: list[str]) -> int:
+        return math.ceil(len(keys) / BATCH_SIZE) + math.ceil(len(repos) / DEPLOY_BATCH_SIZE)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled
+        self._refilled = now
+        self._tokens = min(
+            float(self.budget_per_minute),
+            self._tokens + elapsed * self.budget_per_minute / 60,
+        )
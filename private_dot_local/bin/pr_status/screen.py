@@ -0,0 +1,93 @@
+"""Differential terminal redraw for watch mode.
+
+Screen remembers the last frame it drew and, on the next draw, only moves the
+cursor to rows whose text changed, rewrites them and clears what follows. A
+full clear-and-repaint happens on the first draw and after a resize (the
+terminal has reflowed the old frame).
+
+A frame taller than the terminal scrolls when painted in full, leaving its
+tail on screen above the cursor row; later draws diff only that tail, so the
+rows it occupies can still be addressed absolutely.
+
+Anything else written to the terminal (warnings and errors on stderr) moves
+the cursor and may scroll the frame, so streams wrapped with `guard` make
+the next draw a full repaint.
+"""
+
+from __future__ import annotations
+
+import shutil
+import sys
+from typing import Optional, TextIO
+
+HOME_AND_CLEAR = "\033[H\033[J"
+CLEAR_EOL = "\033[K"
+CLEAR_BELOW = "\033[J"
+
+
+def _move(row: int) -> str:
+    return f"\033[{row + 1};1H"
+
+
+class Screen:
+    def __init__(self, out: Optional[TextIO] = None, height: Optional[int] = None) -> None:
+        self.out = out or sys.stdout
+        self.height = height
+        self.frame: Optional[list[str]] = None
+
+    def invalidate(self) -> None:
+        """Force the next draw to repaint everything."""
+        self.frame = None
+
+    def guard(self, stream: TextIO) -> TextIO:
+        """Wrap a stream sharing the terminal so writes to it invalidate."""
+        return _Guarded(stream, self)
+
+    def _rows(self) -> int:
+        if self.height is not None:
+            return self.height
+        return shutil.get_terminal_size(fallback=(120, 24)).lines
+
+    def diff(self, lines: list[str]) -> str:
+        """Escape sequences turning the last frame into `lines`."""
+        old = self.frame
+        visible = self._rows() - 1  # the last row holds the parked cursor
+        if old is None or visible < 1:
+            return HOME_AND_CLEAR + "".join(line + "\n" for line in lines)
+
+        old, lines = old[-visible:], lines[-visible:]
+        parts: list[str] = []
+        for row, line in enumerate(lines):
+            if row < len(old) and old[row] == line:
+                continue
+            parts.append(_move(row) + line + CLEAR_EOL)
+        if len(lines) < len(old):
+            parts.append(_move(len(lines)) + CLEAR_BELOW)
+        if parts:
+            parts.append(_move(len(lines)))  # park the cursor below the frame
+        return "".join(parts)
+
+    def draw(self, lines: list[str]) -> int:
+        """Draw a frame; returns the number of bytes written."""
+        data = self.diff(lines)
+        self.frame = list(lines)
+        if data:
+            self.out.write(data)
+            self.out.flush()
+        return len(data.encode("utf-8"))
+
+
+class _Guarded:
+    """A text stream proxy that invalidates a Screen whenever it is written."""
+
+    def __init__(self, stream: TextIO, screen: Screen) -> None:
+        self._stream = stream
+        self._screen = screen
+
+    def write(self, text: str) -> int:
+        if text:
+            self._screen.invalidate()
+        return self._stream.write(text)
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
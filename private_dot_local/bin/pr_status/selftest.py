@@ -6,7 +6,36 @@ Run with:
 
 from __future__ import annotations
 
-from .discover import Repo, assign_display_attrs, shorten_repo_name
+import hashlib
+import hmac
+import http.client
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .bench import bench_size, make_fixture
+from .cache import EnrichCache, RepoMetaCache
+from .daemon import DaemonServer, fetch_snapshot, query
+from .deploy import detect_deploy_status, detect_deploy_statuses
+from .discover import (
+    Discovery, Repo, assign_display_attrs, shorten_repo_name, stream_pr_stubs,
+)
+from .fetch import build_batch_query, field_profile, normalize_pr_node
+from . import governor as governor_mod
+from .governor import Governor, RateLimited
+from .metrics import Metrics
 from .model import (
     CIState,
     DeployState,
@@ -16,9 +45,70 @@ from .model import (
     ReviewDecision,
     Reviewer,
     ReviewerState,
+    parse_pr,
     parse_reviewers,
+    pr_from_dict,
+    pr_to_dict,
 )
-from .render import render, strip_ticket
+from .notify import diff_events, state_marks
+from .render import pr_pieces, render, strip_ticket
+from .replay import Faults, record, replay_once
+from .schedule import COLD, HOT, Scheduler, pr_interval
+from .screen import Screen
+from .statusbar import bar_output, load_snapshot, save_snapshot
+from .transport import ResponseCache, Transport, endpoint_name, using_transport
+from .webhook import Touch, WebhookReceiver
+
+
+@contextmanager
+def stand_in_server(
+    route: Callable[[str, str, dict, bytes], tuple[int, dict, bytes]],
+) -> Iterator[tuple[str, list[tuple]]]:
+    """Serve `route(method, path, headers, body)` on localhost over HTTP/1.1.
+
+    Yields (base_url, requests) where requests records (method, path,
+    headers, client_port) for every request served.
+    """
+    requests: list[tuple] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            headers = {k.lower(): v for k, v in self.headers.items()}
+            requests.append((self.command, self.path, headers, self.client_address[1]))
+            status, resp_headers, resp_body = route(self.command, self.path, headers, body)
+            self.send_response(status)
+            for k, v in resp_headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(resp_body)))
+            self.end_headers()
+            self.wfile.write(resp_body)
+
+        do_GET = do_POST = _serve
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def search_response(*prs: tuple) -> bytes:
+    """Search results from (repo, number, updatedAt[, state]) tuples."""
+    nodes = [
+        {"number": n, "updatedAt": updated, "state": rest[0] if rest else "OPEN",
+         "repository": {"nameWithOwner": repo}}
+        for repo, n, updated, *rest in prs
+    ]
+    return json.dumps({"data": {"search": {"nodes": nodes}}}).encode()
 
 
 def test_display_state_precedence() -> None:
@@ -91,6 +181,24 @@ def test_parse_reviewers_stale_vs_revise() -> None:
     assert carol.state == ReviewerState.APPROVED
 
 
+def test_derived_state_is_cached_until_inputs_change() -> None:
+    pr = PR(number=5, title="fa-5: cache it", url="u", repo="o/r", lifecycle=PRLifecycle.MERGED)
+    assert pr.ticket == "FA-5" and pr.display_state == DisplayState.UNKNOWN
+    assert pr._display_state == DisplayState.UNKNOWN
+
+    pr.human_comment_count = 3  # not an input
+    assert pr._display_state == DisplayState.UNKNOWN
+    pr.deploy = DeployState.PROD
+    assert pr._display_state is None and pr.display_state == DisplayState.PROD
+
+    pr.title = "OPS-12: renamed"
+    assert pr.ticket == "OPS-12"
+    copy = replace(pr, lifecycle=PRLifecycle.CLOSED)
+    assert copy.ticket == "OPS-12" and copy.display_state == DisplayState.CLOSED
+    assert pr.display_state == DisplayState.PROD and copy != pr
+    assert "_display_state" not in pr_to_dict(pr)
+
+
 def test_shorten_repo_name() -> None:
     cases = [
         ("core-apps", "core-apps"),
@@ -135,20 +243,830 @@ def test_render_conflicts_are_terminal_only() -> None:
     ]
     terminal = "\n".join(render(prs, repos, slack=False))
     assert "🔀 conflicts" in terminal
-    assert "👀  review" in terminal
+    assert "👀 review" in terminal
 
     slack = "\n".join(render(prs, repos, slack=True))
     assert "🔀 conflicts" not in slack
     assert "review" in slack
 
 
+def test_batch_query_and_normalize() -> None:
+    stubs = [
+        {"_repo": "o/a", "number": 1},
+        {"_repo": "o/b", "number": 2},
+        {"_repo": "o/a", "number": 3},
+    ]
+    query, aliases = build_batch_query(stubs)
+    assert query.count("repository(") == 2
+    assert query.count("pullRequest(") == 3
+    assert aliases[("r0", "p3")]["number"] == 3
+    assert aliases[("r1", "p2")]["_repo"] == "o/b"
+    assert query.count("fragment ") == 1 and "comments(" in query
+
+    # Field projection: merged PRs and review-only PRs ask for less
+    merged = {"_repo": "o/a", "number": 4, "state": "MERGED", "_sources": ["authored_merged"]}
+    review = {"_repo": "o/a", "number": 5, "state": "OPEN", "_sources": ["review_requested"]}
+    assert [field_profile(s) for s in (stubs[0], merged, review)] == ["full", "terminal", "reviewer"]
+    assert field_profile({"_sources": ["authored_merged"]}) == "terminal"
+    query, _ = build_batch_query([merged, review])
+    assert "p4: pullRequest(number: 4) { ...TerminalPRFields }" in query
+    assert "...PRFields" not in query and "comments(" not in query and "latestReviews(" in query
+    terminal = query[query.index("fragment TerminalPRFields"):]
+    assert "Reviews(" not in terminal and "commits(" not in terminal and "mergeCommit" in terminal
+
+    node = {
+        "number": 7, "title": "FA-7: x", "state": "OPEN", "isDraft": False, "url": "u",
+        "author": {"login": "me"},
+        "reviews": {"nodes": [{"author": {"login": "alice"}, "state": "APPROVED"}]},
+        "reviewRequests": {"nodes": [{"requestedReviewer": {"login": "bob"}}]},
+        "comments": {"nodes": [{"author": {"login": "carol"}, "createdAt": "2024-01-01T00:00:00Z"}]},
+        "commits": {"nodes": [{"commit": {"statusCheckRollup": {"contexts": {"nodes": [
+            {"__typename": "CheckRun", "name": "build", "conclusion": "FAILURE", "status": "COMPLETED"},
+        ]}}}}]},
+    }
+    pr = parse_pr(normalize_pr_node(node), "o/a")
+    assert {r.login: r.state for r in pr.reviewers} == {
+        "alice": ReviewerState.APPROVED, "bob": ReviewerState.PENDING,
+    }
+    assert pr.ci == CIState.FAIL and pr.ci_failed == ["build"]
+    assert pr.human_comment_count == 1 and pr.last_human_commenter == "carol"
+
+
+def test_bounded_payload_parses_like_full_one() -> None:
+    full = {
+        "number": 8, "title": "FA-8: big", "state": "OPEN", "author": {"login": "me"},
+        "reviews": [
+            {"author": {"login": "alice"}, "state": "APPROVED", "submittedAt": "2024-01-01T01:00:00Z"},
+            {"author": {"login": "alice"}, "state": "COMMENTED", "submittedAt": "2024-01-01T02:00:00Z"},
+            {"author": {"login": "bob"}, "state": "COMMENTED", "submittedAt": "2024-01-01T03:00:00Z"},
+        ],
+        "comments": [{"author": {"login": "carol"}, "createdAt": f"2024-01-02T00:{i:02d}:00Z"} for i in range(30)],
+        "statusCheckRollup": [
+            {"name": f"job {i}", "conclusion": "FAILURE" if i == 250 else "SUCCESS", "status": "COMPLETED"}
+            for i in range(300)
+        ],
+    }
+    node = {
+        "number": 8, "title": "FA-8: big", "state": "OPEN", "author": {"login": "me"},
+        "latestOpinionatedReviews": {"nodes": [full["reviews"][0]]},
+        "latestReviews": {"nodes": full["reviews"][1:]},
+        "comments": {"totalCount": 30, "nodes": full["comments"][-20:]},
+        "commits": {"nodes": [{"commit": {"statusCheckRollup": {"state": "FAILURE", "contexts": {
+            "checkRunCountsByState": [{"state": "SUCCESS", "count": 299}, {"state": "FAILURE", "count": 1}],
+            "nodes": [{"__typename": "CheckRun", **c} for c in full["statusCheckRollup"][:25]],
+        }}}}]},
+    }
+    expected = parse_pr(full, "o/r")
+    bounded = parse_pr(normalize_pr_node(node), "o/r")
+    assert sorted(bounded.reviewers, key=lambda r: r.login) == sorted(expected.reviewers, key=lambda r: r.login)
+    assert (bounded.human_comment_count, bounded.last_human_commenter) == (20, "carol")
+    assert bounded.comments_truncated and not expected.comments_truncated
+    assert bounded.ci == expected.ci == CIState.FAIL and bounded.ci_failed == ["1 failing"]
+
+    node["commits"]["nodes"][0]["commit"]["statusCheckRollup"]["contexts"]["nodes"].append(
+        {"__typename": "StatusContext", "context": "deploy/preview", "state": "ERROR"})
+    assert parse_pr(normalize_pr_node(node), "o/r").ci_failed == ["deploy/preview"]
+    node["commits"]["nodes"][0]["commit"]["statusCheckRollup"]["state"] = "PENDING"
+    assert parse_pr(normalize_pr_node(node), "o/r").ci == CIState.PENDING
+
+    # New comments: counted while all were fetched, only announced beyond that
+    more = [{"author": {"login": "ci-bot[bot]"}, "createdAt": "2024-01-03T00:00:00Z"},
+            {"author": {"login": "dave"}, "createdAt": "2024-01-03T00:01:00Z"}]
+    before = parse_pr(full, "o/r", ["authored_open"])
+    after = parse_pr({**full, "comments": full["comments"] + more}, "o/r", ["authored_open"])
+    assert [e.message for e in diff_events([before], [after])] == ["💬 dave left 1 comment: big"]
+    before = parse_pr(normalize_pr_node(node), "o/r", ["authored_open"])
+    node["comments"] = {"totalCount": 32, "nodes": (full["comments"] + more)[-20:]}
+    after = parse_pr(normalize_pr_node(node), "o/r", ["authored_open"])
+    assert [e.message for e in diff_events([before], [after])] == ["💬 dave left new comments: big"]
+
+
+def test_enrich_cache_roundtrip_and_eviction() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EnrichCache(root=Path(tmp), max_entries=2)
+        cache.put("o/a", 1, "t1", {"number": 1})
+        assert cache.get("o/a", 1, "t1") == {"number": 1}
+        assert cache.get("o/a", 1, "t2") is None  # updatedAt changed
+        assert cache.get("o/b", 1, "t1") is None
+
+        cache.put("o/a", 2, "t1", {"number": 2})
+        cache.put("o/a", 3, "t1", {"number": 3})
+        stale = time.time() - 60
+        os.utime(cache._path("o/a", 1), (stale, stale))  # least recently used
+        cache.prune()
+        assert cache.get("o/a", 1, "t1") is None
+        assert cache.get("o/a", 3, "t1") == {"number": 3}
+
+        os.utime(cache._path("o/a", 3), (0, 0))  # older than max_age
+        cache.prune()
+        assert cache.get("o/a", 3, "t1") is None
+
+
+def test_transport_rest_and_graphql_over_pooled_connection() -> None:
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        if method == "POST" and path == "/graphql":
+            query = json.loads(body)["query"]
+            return 200, {}, json.dumps({"data": {"echo": query}}).encode()
+        if path == "/repos/o/r":
+            return 200, {}, b'{"default_branch": "trunk"}'
+        return 404, {}, b'{"message": "Not Found"}'
+
+    with stand_in_server(route) as (url, requests):
+        transport = Transport(url, token="t0ken")
+        assert transport.rest("repos/o/r") == {"default_branch": "trunk"}
+        assert transport.rest("repos/o/r/branches/release") is None
+        assert transport.graphql("{ viewer { login } }") == {"data": {"echo": "{ viewer { login } }"}}
+        transport.close()
+
+    assert all(h["authorization"] == "Bearer t0ken" for _, _, h, _ in requests)
+    assert len({port for *_, port in requests}) == 1  # one keep-alive connection
+
+
+def test_governor_paces_and_backs_off() -> None:
+    now = [0.0]
+    slept: list[float] = []
+    gov = Governor(rate=1, burst=2, reserve=10, max_wait=30,
+                   clock=lambda: now[0], wall=lambda: 1000 + now[0], sleep=slept.append)
+    for _ in range(3):
+        with gov.slot():
+            pass
+    assert slept == [1.0]  # burst of two, then one per second
+
+    # Low quota: remaining calls are spread until the reset
+    now[0] += 10
+    gov.observe_headers({"x-ratelimit-limit": "5000", "x-ratelimit-remaining": "110",
+                         "x-ratelimit-reset": str(1000 + now[0] + 100)})
+    assert gov.pool_size(4) == 1
+    with gov.slot():
+        pass
+    assert slept[-1] == 1.0  # 100s over 100 calls above the reserve
+
+    # Exhausted with a far-off reset: fail fast and say so
+    gov.observe_graphql({"cost": 1, "remaining": 3, "resetAt": "2099-01-01T00:00:00Z"})
+    try:
+        with gov.slot("graphql"):
+            raise AssertionError("should not get a slot")
+    except RateLimited:
+        pass
+    assert [w.startswith("graphql rate limit exhausted") for w in gov.take_warnings()] == [True]
+
+    # The transport retries a secondary rate limit after Retry-After
+    attempts = []
+
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        attempts.append(path)
+        if len(attempts) == 1:
+            return 429, {"Retry-After": "0"}, b'{"message": "secondary rate limit"}'
+        return 200, {"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000",
+                     "X-RateLimit-Reset": "9999999999"}, b'{"ok": true}'
+
+    saved = governor_mod.get_governor()
+    governor_mod.set_governor(Governor(sleep=slept.append))
+    try:
+        with stand_in_server(route) as (url, _):
+            assert Transport(url).rest("repos/o/r") == {"ok": True}
+        assert len(attempts) == 2 and slept[-1] == 0
+        assert governor_mod.get_governor().quotas["core"].remaining == 4999
+    finally:
+        governor_mod.set_governor(saved)
+
+
+def test_rest_revalidates_with_etag() -> None:
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        if headers.get("if-none-match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"'}, b'{"name": "release"}'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with stand_in_server(route) as (url, requests):
+            assert Transport(url, cache=ResponseCache(Path(tmp))).rest("x") == {"name": "release"}
+            # A fresh transport (next run) revalidates from the persisted entry
+            assert Transport(url, cache=ResponseCache(Path(tmp))).rest("x") == {"name": "release"}
+        assert "if-none-match" not in requests[0][2]
+        assert requests[1][2]["if-none-match"] == '"v1"'
+
+        # Entries are per API host, and the directory is capped like EnrichCache
+        with stand_in_server(route) as (other, requests):
+            assert Transport(other, cache=ResponseCache(Path(tmp))).rest("x") == {"name": "release"}
+        assert "if-none-match" not in requests[0][2]
+        assert len(list(Path(tmp).glob("*.json"))) == 2
+        ResponseCache(Path(tmp), max_entries=1).prune()
+        assert len(list(Path(tmp).glob("*.json"))) == 1
+
+
+def test_discovery_streams_buckets_concurrently() -> None:
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        q = json.loads(body)["variables"]["q"]
+        if "review-requested" in q:
+            time.sleep(0.3)
+            return 200, {}, search_response(("o/a", 1, "t2"), ("o/a", 2, "t1"))
+        if "is:merged" in q:
+            time.sleep(0.3)
+            return 200, {}, search_response()
+        return 200, {}, search_response(("o/a", 1, "t1"))
+
+    with stand_in_server(route) as (url, _), using_transport(Transport(url)):
+        t0 = time.monotonic()
+        stream = stream_pr_stubs("@me", "2024-01-01T00:00:00Z")
+        first = next(stream)
+        assert time.monotonic() - t0 < 0.25  # did not wait for the slow buckets
+        assert [pr["number"] for pr in first] == [1]
+        rest = [pr for chunk in stream for pr in chunk]
+        assert time.monotonic() - t0 < 0.55  # slow buckets ran in parallel
+
+    assert [pr["number"] for pr in rest] == [2]
+    assert first[0]["_sources"] == ["authored_open", "review_requested"]
+    assert first[0]["updatedAt"] == "t2"
+
+
+def test_incremental_discovery_uses_high_water_mark() -> None:
+    queries: list[str] = []
+
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        q = json.loads(body)["variables"]["q"]
+        queries.append(q)
+        incremental = "updated:>=" in q
+        if q.startswith("is:pr author:@me") and "is:merged" not in q:
+            if incremental:  # #1 got merged, #3 is new
+                return 200, {}, search_response(
+                    ("o/a", 1, "2024-02-02T00:00:00Z", "MERGED"), ("o/a", 3, "2024-02-02T00:00:00Z"),
+                )
+            return 200, {}, search_response(("o/a", 1, "2024-02-01T10:00:00Z"), ("o/a", 2, "2024-01-05T00:00:00Z"))
+        return 200, {}, search_response()
+
+    with stand_in_server(route) as (url, _), using_transport(Transport(url)):
+        discovery = Discovery("@me", "2024-01-01T00:00:00Z")
+        first = {pr["number"] for chunk in discovery.stream() for pr in chunk}
+        queries.clear()
+        second = {pr["number"] for chunk in discovery.stream() for pr in chunk}
+
+    assert first == {1, 2}
+    assert second == {2, 3}
+    authored = [q for q in queries if q.startswith("is:pr author:@me") and "is:merged" not in q]
+    assert authored == ["is:pr author:@me updated:>=2024-02-01T09:55:00Z sort:updated-desc"]
+    # Buckets that never returned anything have no mark and search in full
+    assert "is:pr review-requested:@me is:open sort:updated-desc" in queries
+    assert "is:pr author:@me is:merged merged:>=2024-01-01 sort:updated-desc" in queries
+
+
+def history_response(*commits: tuple[str, str, dict], cursor: str = "") -> bytes:
+    """Default-branch history from (oid, committedDate, {context: state});
+    a `cursor` marks a further page."""
+    nodes = [
+        {"oid": oid, "committedDate": date,
+         "status": {"contexts": [{"context": c, "state": st} for c, st in ctx.items()]}}
+        for oid, date, ctx in commits
+    ]
+    page_info = {"hasNextPage": bool(cursor), "endCursor": cursor or None}
+    history = {"nodes": nodes, "pageInfo": page_info}
+    return json.dumps({"data": {"repository": {"object": {"history": history}}}}).encode()
+
+
+def test_discovery_pages_past_first_hundred() -> None:
+    def page(start: int, count: int, total: int, more: bool) -> bytes:
+        nodes = [{"number": n, "updatedAt": "2024-03-01T00:00:00Z", "state": "OPEN", "repository": {"nameWithOwner": "o/a"}}
+                 for n in range(start, start + count)]
+        return json.dumps({"data": {"search": {
+            "issueCount": total, "pageInfo": {"hasNextPage": more, "endCursor": f"c{start + count}"},
+            "nodes": nodes,
+        }}}).encode()
+
+    cursors: dict[str, list] = {}
+
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        variables = json.loads(body)["variables"]
+        q, after = variables["q"], variables.get("after")
+        cursors.setdefault("merged" if "is:merged" in q else q.split()[1], []).append(after)
+        start = int(after[1:]) if after else 0
+        if "review-requested" in q:  # 1200 matches, GitHub stops at 1000
+            return 200, {}, page(start, 100, 1200, start + 100 < 1000)
+        if "is:merged" in q:
+            return 200, {}, page(start, 100, 400, start + 100 < 400)
+        return 200, {}, page(start, 50 if start else 100, 150, not start)
+
+    saved = governor_mod.get_governor()
+    governor_mod.set_governor(Governor(rate=1e6, burst=10 ** 6))
+    try:
+        with stand_in_server(route) as (url, _), using_transport(Transport(url)):
+            stubs = [pr for chunk in stream_pr_stubs("@me", "2024-02-15T00:00:00Z") for pr in chunk]
+        warnings = governor_mod.get_governor().take_warnings()
+    finally:
+        governor_mod.set_governor(saved)
+
+    assert cursors["author:@me"] == [None, "c100"]
+    assert cursors["merged"] == [None, "c100", "c200", "c300"]
+    assert len(cursors["review-requested:@me"]) == 10
+    assert len({pr["number"] for pr in stubs}) == 1000  # the buckets overlap on o/a numbers
+    assert warnings == ["search (review_requested) capped at 1000 of 1200 PRs"]
+
+
+def test_repo_meta_cache_skips_metadata_probes() -> None:
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        if path == "/repos/o/r":
+            return 200, {}, b'{"default_branch": "main"}'
+        if path.startswith("/repos/o/r/branches/"):
+            return 404, {}, b"{}"
+        return 200, {}, history_response(
+            ("b", "2024-01-03T00:00:00Z", {"deploy-preprod": "SUCCESS"}),
+            ("a", "2024-01-01T00:00:00Z", {"deploy-prod": "SUCCESS"}),
+        )
+
+    repo = Repo(name="r", owner_repo="o/r")
+    prs = [
+        PR(number=1, title="x", url="", repo="o/r", lifecycle=PRLifecycle.MERGED, merged_at="2023-12-31T00:00:00Z"),
+        PR(number=2, title="y", url="", repo="o/r", lifecycle=PRLifecycle.MERGED, merged_at="2024-01-02T00:00:00Z"),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "repos.json"
+        with stand_in_server(route) as (url, requests), using_transport(Transport(url)):
+            meta = RepoMetaCache(path)
+            first, _ = detect_deploy_status(repo, prs, meta)
+            meta.save()
+            probes = len(requests)
+            second, _ = detect_deploy_status(repo, prs, RepoMetaCache(path))
+            assert len(requests) == probes + 1  # only the state query
+            detect_deploy_status(repo, prs, RepoMetaCache(path, ttl=0))
+            assert len(requests) == 2 * probes + 1  # expired: probed again
+
+    assert first == second == {1: DeployState.PROD, 2: DeployState.PREPROD}
+
+
+def test_batched_deploy_detection_single_round_trip() -> None:
+    queries: list[str] = []
+
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        queries.append(json.loads(body)["query"])
+        history = json.loads(history_response(
+            ("a", "2024-01-02T00:00:00Z", {"deploy-prod": "SUCCESS"}),
+        ))["data"]["repository"]["object"]
+        commit = {"committedDate": "2024-01-05T00:00:00Z"}
+        return 200, {}, json.dumps({"data": {
+            "r0": {"defaultBranchRef": {"name": "main", "target": history},
+                   "object": history, "release": None, "develop": None},
+            "r1": {"defaultBranchRef": {"name": "develop", "target": history},
+                   "release": {"target": commit}, "develop": {"target": commit}},
+        }}).encode()
+
+    repos = [Repo(name="ci", owner_repo="o/ci"), Repo(name="br", owner_repo="o/br")]
+    repo_prs = {
+        repo.owner_repo: [PR(number=1, title="x", url="", repo=repo.owner_repo,
+                             lifecycle=PRLifecycle.MERGED, merged_at="2024-01-01T00:00:00Z"),
+                          PR(number=2, title="y", url="", repo=repo.owner_repo,
+                             lifecycle=PRLifecycle.MERGED, merged_at="2024-01-03T00:00:00Z")]
+        for repo in repos
+    }
+    meta = RepoMetaCache()
+    with stand_in_server(route) as (url, _), using_transport(Transport(url)):
+        first = detect_deploy_statuses(repos, repo_prs, meta)
+        second = detect_deploy_statuses(repos, repo_prs, meta)
+
+    assert len(queries) == 2
+    assert "defaultBranchRef" in queries[0]
+    # With metadata cached each repo asks only for what its model needs
+    assert "defaultBranchRef" not in queries[1]
+    assert queries[1].count("history(") == 1 and queries[1].count("release:") == 1
+    assert first == second
+    assert first["o/ci"][0] == {1: DeployState.PROD, 2: DeployState.MERGED}
+    assert first["o/br"][0] == {1: DeployState.PROD, 2: DeployState.PROD}
+
+
+def test_graphql_errors_mark_deploys_unknown() -> None:
+    # A query that fails as a whole answers 200 with errors and null data
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        return 200, {}, json.dumps({"data": None, "errors": [{"message": "Something went wrong"}]}).encode()
+
+    repo = Repo(name="br", owner_repo="o/br")
+    prs = [PR(number=1, title="x", url="", repo=repo.owner_repo,
+              lifecycle=PRLifecycle.MERGED, merged_at="2024-01-01T00:00:00Z")]
+    meta = RepoMetaCache()
+    meta.put(repo.owner_repo, {"default_branch": "develop", "branch_model": True})
+    with stand_in_server(route) as (url, requests), using_transport(Transport(url)):
+        assert Transport(url).graphql("query { viewer { login } }") is None
+        results = detect_deploy_statuses([repo], {repo.owner_repo: prs}, meta)
+
+    # The batch failed outright, so the repo was retried on its own
+    assert len(requests) == 3
+    assert results[repo.owner_repo] == ({1: DeployState.UNKNOWN}, ["GraphQL query failed"])
+
+
+def test_deploy_marker_scan_pages_and_resumes() -> None:
+    queries: list[str] = []
+
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        query = json.loads(body)["query"]
+        queries.append(query)
+        if "since:" in query:
+            return 200, {}, history_response()  # nothing new since the marker
+        if 'after: "c1"' in query:
+            return 200, {}, history_response(("a", "2024-01-02T00:00:00Z", {"deploy-prod": "SUCCESS"}))
+        return 200, {}, history_response(
+            ("b", "2024-01-04T00:00:00Z", {"deploy-prod": "PENDING"}), cursor="c1",
+        )
+
+    repo = Repo(name="r", owner_repo="o/r")
+    prs = [
+        PR(number=1, title="x", url="", repo="o/r", lifecycle=PRLifecycle.MERGED, merged_at="2024-01-01T00:00:00Z"),
+        PR(number=2, title="y", url="", repo="o/r", lifecycle=PRLifecycle.MERGED, merged_at="2024-01-03T00:00:00Z"),
+    ]
+    meta = RepoMetaCache()
+    meta.put("o/r", {"default_branch": "main", "branch_model": False})
+    with stand_in_server(route) as (url, _), using_transport(Transport(url)):
+        first, warnings = detect_deploy_status(repo, prs, meta)
+        assert len(queries) == 2 and not warnings  # found on the second page
+        second, warnings = detect_deploy_status(repo, prs, meta)
+
+    assert 'since: "2024-01-02T00:00:00Z"' in queries[2] and not warnings
+    assert first == second == {1: DeployState.PROD, 2: DeployState.MERGED}
+    assert meta.get("o/r")["prod_marker"] == {"oid": "a", "committedDate": "2024-01-02T00:00:00Z"}
+
+
+def test_scheduler_intervals_and_budget() -> None:
+    recent = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - 60))
+    old = "2020-01-01T00:00:00Z"
+    pending = PR(number=1, title="x", url="", repo="o/a", lifecycle=PRLifecycle.OPEN, ci=CIState.PENDING, updated_at=old)
+    draft = PR(number=2, title="x", url="", repo="o/a", lifecycle=PRLifecycle.DRAFT, updated_at=old)
+    shipping = PR(number=3, title="x", url="", repo="o/b", lifecycle=PRLifecycle.MERGED, deploy=DeployState.PREPROD, sources=["authored_merged"], updated_at=recent)
+    assert pr_interval(pending) == HOT
+    assert pr_interval(draft) == COLD
+
+    now = [1000.0]
+    sched = Scheduler(300, budget_per_minute=1, clock=lambda: now[0])
+    assert sched.discovery_due()
+    # A discovery cycle checks the new repo and hands intervals out
+    assert sched.repo_needs_check("o/b", [shipping])
+    sched.observe([pending, draft, shipping])
+    sched.refreshed([], ["o/b"], [pending, draft, shipping])
+    sched.discovered()
+    assert not sched.repo_needs_check("o/b", [shipping])
+    assert sched.plan() == ([], [])
+    assert sched.next_wakeup() == HOT
+
+    # CI-pending PR comes due first; the deploy in flight waits for budget
+    now[0] += 61
+    assert sched.plan() == ([("o/a", 1)], [])
+    sched.refreshed([("o/a", 1)], [], [pending])
+    now[0] += 10
+    assert sched.plan() == ([], [])  # out of budget
+    assert abs(sched.next_wakeup() - 50) < 1e-6  # not before a token is back
+    now[0] += 55
+    assert sched.plan() == ([], ["o/b"])
+    sched.refreshed([], ["o/b"], [shipping])
+
+    # A newly merged PR makes its repo due for the next discovery cycle
+    fresh = PR(number=4, title="x", url="", repo="o/b", lifecycle=PRLifecycle.MERGED, sources=["authored_merged"])
+    assert sched.repo_needs_check("o/b", [shipping, fresh])
+
+    # Without a snapshot (a failed cycle) only discovery is waited for
+    now[0] += 3600
+    assert sched.next_wakeup() == 0.0
+    sched.forget()
+    sched.discovered()
+    assert sched.next_wakeup() == 300
+
+
+def test_bench_fixture_and_phases() -> None:
+    fixture = make_fixture(50, seed=1)
+    assert fixture == make_fixture(50, seed=1)  # deterministic
+    prs = [parse_pr(raw, repo) for repo, raw in fixture]
+    assert {pr.lifecycle for pr in prs} >= {PRLifecycle.OPEN, PRLifecycle.MERGED}
+    assert any(pr.reviewers for pr in prs) and any(pr.ci == CIState.PENDING for pr in prs)
+    phases = [name for name, _, _ in bench_size(20, [60], repeat=1)]
+    assert phases == ["parse_pr", "derive_display_state", "render (width 60)", "render (slack)", "diff_and_notify"]
+
+
+def test_record_and_replay_run_once() -> None:
+    def route(method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        query = json.loads(body)["query"]
+        if "PRFields" in query:
+            node = {"number": 1, "title": "FA-1: x", "state": "OPEN", "url": "u",
+                    "author": {"login": "me"}, "reviewRequests": {"nodes": [{"requestedReviewer": {"login": "bob"}}]}}
+            return 200, {}, json.dumps({"data": {"r0": {"p1": node}}}).encode()
+        q = json.loads(body)["variables"]["q"]
+        if "author:@me is:open" in q:
+            return 200, {}, search_response(("o/r", 1, "2024-01-01T00:00:00Z"))
+        return 200, {}, search_response()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with stand_in_server(route) as (url, requests):
+            record(Path(tmp), "@me", 30, False, api_url=url)
+        recorded = len(requests)
+        assert recorded == 4  # three searches, one batch
+
+        # Offline: the server is gone, the recording answers
+        snapshot, lines, fixture = replay_once(Path(tmp), Faults(latency=0.01))
+        assert [pr.number for pr in snapshot.prs] == [1] and not fixture.misses
+        assert any("bob" in line for line in lines)
+
+        faults = Faults(fail_rate=1.0)
+        snapshot, _, _ = replay_once(Path(tmp), faults)
+        assert not snapshot.prs and faults.failures == faults.calls >= 3
+
+
+def test_metrics_summary_and_textfile() -> None:
+    assert endpoint_name("/repos/o/r/branches/release/x") == "/repos/:repo/branches/:branch"
+    assert endpoint_name("/repos/o/r/commits/abc/status?per_page=1") == "/repos/:repo/commits/:sha/status"
+
+    m = Metrics()
+    for seconds in (0.004, 0.03, 0.2, 0.2):
+        m.observe("pr_status_api_request_seconds", seconds, endpoint="graphql")
+    m.inc("pr_status_api_requests_total", 4, endpoint="graphql", status="200")
+    m.inc("pr_status_enrich_cache_total", 3, result="memory")
+    m.inc("pr_status_enrich_cache_total", 1, result="miss")
+    m.phase("discover", 1.5)
+
+    summary = "\n".join(m.summary())
+    assert "API requests:  4 (graphql 4); p50 ≤50ms, p95 ≤250ms" in summary
+    assert "Enrich cache:  75% hit (memory 3, miss 1)" in summary
+    assert "discover 1.50s" in summary
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pr_status.prom"
+        m.write_textfile(path)
+        text = path.read_text()
+    assert "# TYPE pr_status_api_request_seconds histogram" in text
+    assert 'pr_status_api_request_seconds_bucket{endpoint="graphql",le="0.05"} 2' in text
+    assert 'pr_status_api_request_seconds_bucket{endpoint="graphql",le="+Inf"} 4' in text
+    assert 'pr_status_api_request_seconds_count{endpoint="graphql"} 4' in text
+    assert 'pr_status_enrich_cache_total{result="memory"} 3' in text
+    assert 'pr_status_last_phase_seconds{phase="discover"} 1.5' in text
+
+
+def test_compact_pr_model() -> None:
+    raw = {"number": 1, "state": "OPEN", "author": {"login": "me"},
+           "reviews": [{"author": {"login": "".join(["al", "ice"])}, "state": "APPROVED"}],
+           "statusCheckRollup": [{"name": "build", "conclusion": "FAILURE", "status": "COMPLETED"}]}
+    pr = parse_pr(raw, "o/" + "r", ["authored_open"])
+    assert not hasattr(pr, "_raw")
+    if sys.version_info >= (3, 10):
+        assert not hasattr(pr, "__dict__")
+    assert pr.repo is sys.intern("o/r") and pr.reviewers[0].login is sys.intern("alice")
+    assert pr.ci_failed == ["build"]
+    try:
+        pr.reviewers[0].state = ReviewerState.STALE  # type: ignore[misc]
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Reviewer should be frozen")
+
+
+def test_screen_redraws_only_changed_lines() -> None:
+    out = io.StringIO()
+    screen = Screen(out, height=50)
+    frame = [f"PR {i}: waiting for review" for i in range(40)]
+    full = screen.draw(frame)
+    assert out.getvalue().startswith("\033[H\033[J")
+
+    out.truncate(0), out.seek(0)
+    assert screen.draw(frame) == 0 and out.getvalue() == ""
+
+    frame[7] = "PR 7: approved"
+    written = screen.draw(frame)
+    assert out.getvalue() == "\033[8;1HPR 7: approved\033[K\033[41;1H"
+    assert written * 20 < full
+
+    out.truncate(0), out.seek(0)
+    screen.draw(frame[:30])
+    assert out.getvalue() == "\033[31;1H\033[J\033[31;1H"
+
+    # Taller than the terminal: only the 49 rows left on screen are diffed
+    out.truncate(0), out.seek(0)
+    tall = frame + [f"more {i}" for i in range(20)]
+    screen.draw(tall)
+    assert "\033[H" not in out.getvalue() and out.getvalue().count("\033[K") == 49
+    tall[0], tall[-1] = "PR 0: scrolled off", "more 19: done"
+    out.truncate(0), out.seek(0)
+    screen.draw(tall)
+    assert out.getvalue() == "\033[49;1Hmore 19: done\033[K\033[50;1H"
+
+    # A warning on stderr may scroll the terminal: repaint in full
+    err = io.StringIO()
+    print("⚠ search failed", file=screen.guard(err))
+    out.truncate(0), out.seek(0)
+    screen.draw(tall)
+    assert out.getvalue().startswith("\033[H\033[J") and err.getvalue() == "⚠ search failed\n"
+
+    # After a resize: repaint in full
+    screen = Screen(out, height=50)
+    screen.draw(frame)
+    screen.invalidate()
+    out.truncate(0), out.seek(0)
+    screen.draw(frame)
+    assert out.getvalue().startswith("\033[H\033[J")
+
+
+def test_render_pieces_are_memoized_by_state() -> None:
+    pr = PR(number=9, title="FA-9: tidy up", url="u", repo="o/pieces", lifecycle=PRLifecycle.OPEN,
+            reviewers=[Reviewer("alice", ReviewerState.PENDING)])
+    first = pr_pieces(pr, False)
+    assert first.title == "tidy up" and first.ticket == "FA-9" and "alice" in first.detail_plain
+    assert pr_pieces(pr, False) is first
+    narrow = render([pr], [Repo(name="pieces", owner_repo="o/pieces")], False, width=40)
+    wide = render([pr], [Repo(name="pieces", owner_repo="o/pieces")], False, width=160)
+    assert narrow != wide and pr_pieces(pr, False) is first
+
+    pr.ci = CIState.FAIL
+    pr.ci_failed = ["build"]
+    changed = pr_pieces(pr, False)
+    assert changed is not first and changed.label == "ci fail" and "build" in changed.detail_plain
+    assert pr_pieces(pr, True) is not changed  # Slack has its own plain pieces
+
+
+def test_diff_events_skips_unchanged_prs() -> None:
+    def raw(number: int, **extra) -> dict:
+        return {"number": number, "title": f"FA-{number}: change {number}", "state": "OPEN",
+                "author": {"login": "me"}, "url": f"u/{number}", **extra}
+
+    old = [parse_pr(raw(1), "o/r", ["authored_open"]),
+           parse_pr(raw(2, state="MERGED"), "o/r", ["authored_merged"])]
+    old[1].deploy = DeployState.MERGED
+    marks = state_marks(old)
+    assert old[0].fingerprint and old[0].fingerprint == parse_pr(raw(1), "o/r", ["authored_open"]).fingerprint
+
+    # Re-fetched but unchanged, and the same object deployed in place
+    new = [parse_pr(raw(1), "o/r", ["authored_open"]), old[1],
+           parse_pr(raw(3), "o/r", ["review_requested"])]
+    old[1].deploy = DeployState.PROD
+    events = diff_events(old, new, marks)
+    assert [(e.kind, e.number) for e in events] == [("deployed_prod", 2), ("review_requested", 3)]
+    assert events[0].message == "🚀 Deployed to prod: change 2"
+
+    failing = raw(1, statusCheckRollup=[{"name": "build", "conclusion": "FAILURE", "status": "COMPLETED"}],
+                  reviews=[{"author": {"login": "alice"}, "state": "APPROVED"}])
+    events = diff_events(new, [parse_pr(failing, "o/r", ["authored_open"])])
+    assert [e.message for e in events] == ["❌ CI failed (build): change 1", "✅ alice approved: change 1"]
+
+
+def test_daemon_serves_snapshot_over_socket() -> None:
+    raw = {"number": 4, "title": "FA-4: ship it", "state": "MERGED", "author": {"login": "me"},
+           "reviews": [{"author": {"login": "alice"}, "state": "APPROVED"}], "url": "u/4"}
+    pr = parse_pr(raw, "o/r", ["authored_merged"])
+    pr.deploy = DeployState.PREPROD
+    encoded = pr_to_dict(pr)
+    assert "fingerprint" not in encoded  # salted per process, recomputed on load
+    copy = pr_from_dict(json.loads(json.dumps(encoded)))
+    assert copy == pr and copy.fingerprint == pr.fingerprint
+
+    config = {"author": "@me", "days": 30, "deploy": True}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "d.sock"
+        assert query({"cmd": "ping"}, path) is None
+        server = DaemonServer(path, config)
+        server.start()
+        try:
+            assert query({"cmd": "ping", **config}, path)["ok"]
+            assert fetch_snapshot(config, path=path) is None  # nothing published yet
+            server.publish([pr])
+            generation, prs = fetch_snapshot(config, path=path)
+            assert prs == [pr] and prs[0].display_state == DisplayState.PREPROD
+            assert fetch_snapshot(config, generation, path) == (generation, None)
+            assert fetch_snapshot({**config, "days": 7}, path=path) is None
+            lines = query({"cmd": "render", "width": 80}, path)["lines"]
+            assert any("ship it" in line for line in lines)
+            assert query({"cmd": "render", "width": "80"}, path) == {
+                "ok": False, "error": "width must be a positive integer"}
+        finally:
+            server.close()
+        assert not path.exists()
+
+
+def test_status_bar_reads_saved_snapshot() -> None:
+    failing = PR(number=1, title="FA-1: flaky", url="u/1", repo="o/r", lifecycle=PRLifecycle.OPEN,
+                 ci=CIState.FAIL, ci_failed=["build"], updated_at="2024-01-02T00:00:00Z")
+    review = PR(number=2, title="FA-2: docs", url="u/2", repo="o/r", lifecycle=PRLifecycle.OPEN,
+                reviewers=[Reviewer("alice", ReviewerState.PENDING)])
+    merged = PR(number=3, title="FA-3: done", url="u/3", repo="o/r", lifecycle=PRLifecycle.MERGED,
+                deploy=DeployState.PROD)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "snapshot.json"
+        assert load_snapshot(path) is None
+        save_snapshot([review, failing, merged], path)
+        written, prs = load_snapshot(path)
+    assert [pr.number for pr in prs] == [2, 1, 3]
+
+    out = bar_output((written, prs), max_age=600, now=written + 30)
+    assert out["counts"] == {"review": 1, "ci_fail": 1, "prod": 1}
+    assert out["text"] == "❌1 👀1" and out["class"] == ["ci_fail"] and not out["stale"]
+    assert out["urgent"]["number"] == 1 and out["urgent"]["title"] == "flaky"
+    assert "flaky" in out["tooltip"] and "\033" not in out["tooltip"]
+
+    stale = bar_output((written, prs), max_age=600, now=written + 3600)
+    assert stale["stale"] and "stale" in stale["class"] and stale["age"] == 3600
+    assert bar_output(None)["stale"]
+
+
+def test_webhook_deliveries_push_refreshes() -> None:
+    receiver = WebhookReceiver(b"s3cret", 0)
+    receiver.start()
+
+    def post(event: str, payload: dict, secret: bytes = b"s3cret") -> int:
+        body = json.dumps(payload).encode()
+        signature = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{receiver.port}/", data=body, method="POST",
+            headers={"X-GitHub-Event": event, "X-Hub-Signature-256": signature},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def post_length(length: str) -> int:
+        conn = http.client.HTTPConnection("127.0.0.1", receiver.port, timeout=5)
+        try:
+            conn.putrequest("POST", "/")
+            conn.putheader("Content-Length", length)
+            conn.endheaders()
+            return conn.getresponse().status
+        finally:
+            conn.close()
+
+    repo = {"full_name": "o/r"}
+    try:
+        assert post_length("-1") == post_length("lots") == 400
+        assert post("pull_request_review", {"repository": repo, "pull_request": {"number": 1}}, b"wrong") == 401
+        assert not receiver.wake.is_set() and not receiver.active()
+        assert post("pull_request_review", {"repository": repo, "pull_request": {"number": 1}}) == 202
+        assert post("issue_comment", {"repository": repo, "issue": {"number": 9}}) == 202  # not a PR
+        assert post("pull_request", {"action": "closed", "repository": repo,
+                                     "pull_request": {"number": 2, "merged": True}}) == 202
+        assert post("status", {"repository": repo, "sha": "abc"}) == 202
+        assert receiver.wake.is_set() and receiver.active() and not receiver.active(quiet=0)
+        touches = receiver.drain()
+    finally:
+        receiver.close()
+    assert touches == [
+        Touch("o/r", (1,)), Touch("o/r", (2,), deploys=True), Touch("o/r", all_open=True, deploys=True),
+    ]
+    assert not receiver.wake.is_set() and receiver.drain() == []
+
+    clock = [0.0]
+    scheduler = Scheduler(60, clock=lambda: clock[0])
+    scheduler.set_interval_scale(10)  # deliveries are arriving
+    open_pr = PR(number=1, title="t", url="u", repo="o/r", lifecycle=PRLifecycle.OPEN, ci=CIState.PENDING)
+    scheduler.observe([open_pr])
+    scheduler.discovered()
+    clock[0] = 20.0
+    assert scheduler.plan() == ([], [])  # HOT stretched to 150s
+    scheduler.push([("o/r", 1), ("o/r", 7)], [])
+    assert scheduler.plan() == ([("o/r", 1)], []) and not scheduler.discovery_due()
+    scheduler.refreshed([("o/r", 1)], [], [open_pr])
+    assert scheduler.next_wakeup() == 150 and scheduler.next_discovery == 600
+
+    # The forwarder went quiet: back to the regular cadence
+    scheduler.set_interval_scale(1)
+    assert scheduler.next_wakeup() == HOT
+    clock[0] = 80.0
+    assert scheduler.discovery_due()
+
+
+TESTS = (
+    test_display_state_precedence,
+    test_parse_reviewers_stale_vs_revise,
+    test_derived_state_is_cached_until_inputs_change,
+    test_shorten_repo_name,
+    test_strip_ticket,
+    test_render_conflicts_are_terminal_only,
+    test_batch_query_and_normalize,
+    test_bounded_payload_parses_like_full_one,
+    test_enrich_cache_roundtrip_and_eviction,
+    test_transport_rest_and_graphql_over_pooled_connection,
+    test_rest_revalidates_with_etag,
+    test_governor_paces_and_backs_off,
+    test_discovery_streams_buckets_concurrently,
+    test_incremental_discovery_uses_high_water_mark,
+    test_discovery_pages_past_first_hundred,
+    test_repo_meta_cache_skips_metadata_probes,
+    test_batched_deploy_detection_single_round_trip,
+    test_graphql_errors_mark_deploys_unknown,
+    test_deploy_marker_scan_pages_and_resumes,
+    test_scheduler_intervals_and_budget,
+    test_bench_fixture_and_phases,
+    test_record_and_replay_run_once,
+    test_metrics_summary_and_textfile,
+    test_compact_pr_model,
+    test_screen_redraws_only_changed_lines,
+    test_render_pieces_are_memoized_by_state,
+    test_diff_events_skips_unchanged_prs,
+    test_daemon_serves_snapshot_over_socket,
+    test_status_bar_reads_saved_snapshot,
+    test_webhook_deliveries_push_refreshes,
+)
+
+
 def main() -> None:
-    test_display_state_precedence()
-    test_parse_reviewers_stale_vs_revise()
-    test_shorten_repo_name()
-    test_strip_ticket()
-    test_render_conflicts_are_terminal_only()
-    print("pr_status self-tests passed")
+    # Run everything, so one failure can't hide the rest
+    failed = []
+    for test in TESTS:
+        try:
+            test()
+        except Exception:
+            traceback.print_exc()
+            failed.append(test.__name__)
+    if failed:
+        sys.exit(f"pr_status self-tests failed: {', '.join(failed)}")
+    print(f"pr_status self-tests passed ({len(TESTS)})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""Status-bar output (waybar, sketchybar) from the last persisted snapshot.
+
+Every cycle that talks to GitHub saves its snapshot to the cache dir;
+`pr-status --bar` only reads it back, so a bar can run it every few seconds.
+The output is one JSON object: waybar's text/tooltip/class/alt keys, plus
+counts per display state, the most urgent PR and how old the data is.
+"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Optional
+
+from .cache import cache_root, read_json, write_json_atomic
+from .discover import build_repo_index
+from .model import DISPLAY_META, DisplayState, PR, pr_from_dict, pr_to_dict
+from .render import render, strip_formatting, strip_ticket
+
+DEFAULT_MAX_AGE = 600
+TOOLTIP_WIDTH = 100
+
+# States that want something from somebody, most urgent first
+URGENT_STATES = (
+    DisplayState.CI_FAIL,
+    DisplayState.CHANGES,
+    DisplayState.STALE,
+    DisplayState.REVISE,
+    DisplayState.APPROVED,
+    DisplayState.REVIEW,
+)
+
+
+def snapshot_path() -> Path:
+    return cache_root() / "snapshot.json"
+
+
+def save_snapshot(prs: list[PR], path: Optional[Path] = None) -> None:
+    write_json_atomic(path or snapshot_path(), {
+        "written": time.time(), "prs": [pr_to_dict(pr) for pr in prs],
+    })
+
+
+def load_snapshot(path: Optional[Path] = None) -> Optional[tuple[float, list[PR]]]:
+    """(written epoch, PRs) of the last saved snapshot, None if unreadable."""
+    data = read_json(path or snapshot_path())
+    if not data:
+        return None
+    try:
+        return float(data["written"]), [pr_from_dict(d) for d in data["prs"]]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def bar_output(
+    saved: Optional[tuple[float, list[PR]]],
+    max_age: float = DEFAULT_MAX_AGE,
+    now: Optional[float] = None,
+) -> dict:
+    now = time.time() if now is None else now
+    if saved is None:
+        return {"text": "PRs ?", "tooltip": "pr-status has not run yet", "class": ["stale"],
+                "alt": "unknown", "counts": {}, "urgent": None, "updated": None, "age": None,
+                "stale": True}
+
+    written, prs = saved
+    age = max(0.0, now - written)
+    stale = age > max_age
+    counts: dict[str, int] = {}
+    states = [(pr.display_state, pr) for pr in prs]
+    for state, _ in states:
+        counts[state.name.lower()] = counts.get(state.name.lower(), 0) + 1
+
+    rank = {state: i for i, state in enumerate(URGENT_STATES)}
+    candidates = [(rank[state], pr) for state, pr in states if state in rank]
+    urgent: Optional[PR] = None
+    if candidates:
+        # Most urgent state first; within it, the longest-waiting PR
+        urgent = min(candidates, key=lambda c: (c[0], c[1].updated_at or c[1].created_at))[1]
+
+    text = " ".join(
+        f"{DISPLAY_META[state][0]}{counts[state.name.lower()]}"
+        for state in URGENT_STATES if state.name.lower() in counts
+    ) or "✓"
+    repos = build_repo_index(sorted({pr.repo for pr in prs}))
+    tooltip = [strip_formatting(line) for line in render(prs, repos, False, width=TOOLTIP_WIDTH)]
+    tooltip.append(f"updated {_ago(age)} ago" + (" (stale)" if stale else ""))
+
+    alt = urgent.display_state.name.lower() if urgent else "idle"
+    return {
+        "text": text,
+        "tooltip": "\n".join(tooltip),
+        "class": [alt] + (["stale"] if stale else []),
+        "alt": alt,
+        "counts": counts,
+        "urgent": {
+            "repo": urgent.repo, "number": urgent.number, "title": strip_ticket(urgent.title),
+            "url": urgent.url, "state": alt,
+        } if urgent else None,
+        "updated": written,
+        "age": round(age),
+        "stale": stale,
+    }
+
+
+def _ago(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
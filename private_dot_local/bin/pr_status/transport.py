@@ -0,0 +1,387 @@
+"""In-process GitHub API transport with a keep-alive connection pool.
+
+Replaces one `gh` process per call: the token is read once (from GH_TOKEN /
+GITHUB_TOKEN or `gh auth token`) and requests reuse pooled HTTP(S)
+connections. Serves both REST and GraphQL.
+
+REST GETs are revalidated through a ResponseCache: stored ETag/Last-Modified
+values are sent back as If-None-Match/If-Modified-Since, and a 304 (which
+carries no body and doesn't count against the primary rate limit) is answered
+from the cached body.
+
+PR_STATUS_API_URL points the transport at another API root (e.g. a local
+stand-in server in tests); GH_HOST selects a GitHub Enterprise host.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+
+from .cache import cache_root, prune_dir, read_json, touch, write_json_atomic
+from .governor import RateLimited, get_governor
+from .metrics import get_metrics
+
+DEFAULT_API_URL = "https://api.github.com"
+USER_AGENT = "pr-status"
+MAX_RATE_LIMIT_RETRIES = 2
+
+# Collapse REST paths to endpoint templates for metrics
+_ENDPOINT_PATTERNS = [
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/:repo"),
+    (re.compile(r"/branches/.+$"), "/branches/:branch"),
+    (re.compile(r"/commits/[^/]+"), "/commits/:sha"),
+    (re.compile(r"\?.*$"), ""),
+]
+
+
+def endpoint_name(path: str) -> str:
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)  # lowercased names
+    body: bytes = b""
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            return None
+
+
+class ResponseCache:
+    """Validators and bodies of REST GET responses, keyed by URL.
+
+    Kept in memory; with `root` set, also persisted so revalidation works
+    across runs, and pruned like EnrichCache: entries untouched for
+    `max_age_days` go, then the least recently used beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_entries: int = 2000,
+        max_age_days: float = 45,
+    ) -> None:
+        self.root = root
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Optional[Path]:
+        if self.root is None:
+            return None
+        return self.root / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+        path = self._path(key)
+        if entry is None and path is not None:
+            entry = read_json(path)
+            if entry is not None and entry.get("key") == key:
+                touch(path)
+                with self._lock:
+                    self._entries[key] = entry
+            else:
+                entry = None
+        return entry
+
+    def put(self, key: str, resp: Response) -> None:
+        etag = resp.headers.get("etag", "")
+        last_modified = resp.headers.get("last-modified", "")
+        if not etag and not last_modified:
+            return
+        entry = {
+            "key": key,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": resp.body.decode("utf-8", "replace"),
+        }
+        with self._lock:
+            self._entries[key] = entry
+        path = self._path(key)
+        if path is not None:
+            write_json_atomic(path, entry)
+
+    def prune(self) -> None:
+        if self.root is not None:
+            prune_dir(self.root, self.max_entries, self.max_age)
+
+    @staticmethod
+    def validators(entry: dict) -> dict[str, str]:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+class Transport:
+    """Thread-safe GitHub API client over a pool of keep-alive connections."""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_API_URL,
+        token: Optional[str] = None,
+        pool_size: int = 8,
+        timeout: float = 30,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        parts = urlsplit(self.base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname or "api.github.com"
+        self.port = parts.port
+        self.prefix = parts.path
+        # GHES serves REST under /api/v3 and GraphQL under /api/graphql
+        if self.prefix.endswith("/api/v3"):
+            self.graphql_path = self.prefix[: -len("v3")] + "graphql"
+        else:
+            self.graphql_path = self.prefix + "/graphql"
+        self.token = token
+        self.timeout = timeout
+        self.cache = cache
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(maxsize=pool_size)
+
+    # ---- connection pool ----
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "http":
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ---- requests ----
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Optional[Response]:
+        """Send a request; returns None on network failure.
+
+        Paced by the shared governor, which also sees every response's rate
+        limit headers. Rate-limited responses are retried after the wait
+        GitHub asks for, if that is short enough.
+        """
+        url = path if path.startswith("/") else f"{self.prefix}/{path}"
+        hdrs = {
+            "User-Agent": USER_AGENT,
+            "Accept": "application/vnd.github+json",
+            **(headers or {}),
+        }
+        if self.token:
+            hdrs["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            hdrs.setdefault("Content-Type", "application/json")
+
+        resource = "graphql" if url == self.graphql_path else "core"
+        governor = get_governor()
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                with governor.slot(resource):
+                    t0 = time.monotonic()
+                    resp = self._send(method, url, body, hdrs)
+                    elapsed = time.monotonic() - t0
+            except RateLimited:
+                return None
+            self._record(resource, url, resp, elapsed)
+            if resp is None:
+                return None
+            governor.observe_headers(resp.headers, resource)
+            wait = governor.backoff(resp.status, resp.headers)
+            if wait is None:
+                return resp
+            if wait > governor.max_wait or attempt == MAX_RATE_LIMIT_RETRIES:
+                governor.warn(f"{resource} requests rate limited by GitHub (HTTP {resp.status})")
+                return resp
+            governor.sleep(wait)
+        return None
+
+    def _record(self, resource: str, url: str, resp: Optional[Response], elapsed: float) -> None:
+        metrics = get_metrics()
+        endpoint = "graphql" if resource == "graphql" else endpoint_name(url[len(self.prefix):])
+        status = str(resp.status) if resp else "error"
+        metrics.inc("pr_status_api_requests_total", endpoint=endpoint, status=status)
+        metrics.observe("pr_status_api_request_seconds", elapsed, endpoint=endpoint)
+        if resp:
+            metrics.inc("pr_status_api_response_bytes_total", len(resp.body), endpoint=endpoint)
+
+    def _send(
+        self, method: str, url: str, body: Optional[bytes], hdrs: dict[str, str],
+    ) -> Optional[Response]:
+        """One request; a pooled connection the server already closed is
+        retried once on a fresh connection."""
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.request(method, url, body=body, headers=hdrs)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                if attempt:
+                    return None
+                continue
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return Response(
+                status=resp.status,
+                headers={k.lower(): v for k, v in resp.getheaders()},
+                body=data,
+            )
+        return None
+
+    def rest(self, path: str) -> Optional[Any]:
+        """GET a REST path (e.g. "repos/o/r"); parsed JSON or None on failure."""
+        key = f"{self.base_url}/{path.lstrip('/')}"  # one cache may serve several hosts
+        entry = self.cache.get(key) if self.cache else None
+        headers = ResponseCache.validators(entry) if entry else None
+        resp = self.request("GET", path, headers=headers)
+        if resp and resp.status == 304 and entry:
+            get_metrics().inc("pr_status_http_cache_total", result="hit")
+            resp = Response(200, resp.headers, entry["body"].encode("utf-8"))
+        elif resp and resp.ok and self.cache:
+            get_metrics().inc("pr_status_http_cache_total", result="miss")
+            self.cache.put(key, resp)
+        if not resp or not resp.ok:
+            return None
+        return resp.json()
+
+    def graphql(self, query: str, variables: Optional[dict] = None) -> Optional[dict]:
+        """POST a GraphQL query; the full response dict ({"data", "errors"}).
+
+        None on failure, including a response whose errors left no data at all
+        (like `gh api graphql` exiting non-zero); partial data is returned.
+        """
+        payload: dict[str, Any] = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        resp = self.request("POST", self.graphql_path, body=json.dumps(payload).encode())
+        if not resp or not resp.ok:
+            return None
+        data = resp.json()
+        if not isinstance(data, dict) or not isinstance(data.get("data"), dict):
+            return None
+        return data
+
+
+# ============================================================
+# Shared instance
+# ============================================================
+
+_lock = threading.Lock()
+_transport: Optional[Transport] = None
+_resolved = False
+
+
+def response_cache_root() -> Path:
+    return cache_root() / "http"
+
+
+def _api_url() -> str:
+    url = os.environ.get("PR_STATUS_API_URL")
+    if url:
+        return url
+    host = os.environ.get("GH_HOST", "")
+    if host and host != "github.com":
+        return f"https://{host}/api/v3"
+    return DEFAULT_API_URL
+
+
+def _read_token() -> Optional[str]:
+    for var in ("GH_TOKEN", "GITHUB_TOKEN"):
+        if os.environ.get(var):
+            return os.environ[var]
+    cmd = ["gh", "auth", "token"]
+    if os.environ.get("GH_HOST"):
+        cmd += ["--hostname", os.environ["GH_HOST"]]
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    token = r.stdout.strip()
+    return token if r.returncode == 0 and token else None
+
+
+def get_transport() -> Optional[Transport]:
+    """Return the shared transport, or None if no token is available."""
+    global _transport, _resolved
+    with _lock:
+        if not _resolved:
+            token = _read_token()
+            if token or os.environ.get("PR_STATUS_API_URL"):
+                _transport = Transport(
+                    _api_url(), token, cache=ResponseCache(response_cache_root()),
+                )
+            _resolved = True
+        return _transport
+
+
+def set_transport(transport: Optional[Transport]) -> None:
+    """Install a transport explicitly (tests, replay); None falls back to gh."""
+    global _transport, _resolved
+    with _lock:
+        _transport = transport
+        _resolved = True
+
+
+@contextmanager
+def using_transport(transport: Optional[Transport]) -> Iterator[None]:
+    """set_transport for the duration of a block, then put back whatever was
+    there before (including "not resolved yet")."""
+    global _transport, _resolved
+    with _lock:
+        saved = (_transport, _resolved)
+        _transport, _resolved = transport, True
+    try:
+        yield
+    finally:
+        with _lock:
+            _transport, _resolved = saved
@@ -1,11 +1,31 @@
-"""Shared utilities for running external commands."""
+"""Shared utilities for running external commands and GitHub API calls.
+
+API calls go through the in-process transport when a token is available and
+fall back to spawning `gh api` otherwise.
+"""
 
 from __future__ import annotations
 
 import json
 import os
 import subprocess
-from typing import Optional
+import time
+from typing import Any, Callable, Optional
+
+from .governor import RateLimited, get_governor
+from .metrics import get_metrics
+from .transport import get_transport
+
+
+# Replaces subprocess execution in `run` when set (record/replay)
+Runner = Callable[..., Optional[str]]  # (cmd, env, timeout)
+_runner: Optional[Runner] = None
+
+
+def set_runner(runner: Optional[Runner]) -> None:
+    """Route `run` through `runner(cmd, env, timeout)`; None restores subprocess."""
+    global _runner
+    _runner = runner
 
 
 def run(
@@ -15,6 +35,23 @@ def run(
     warn_on_failure: Optional[str] = None,
 ) -> Optional[str]:
     """Run a command, return stdout or None on failure."""
+    command = " ".join(cmd[:2])
+    get_metrics().inc("pr_status_subprocess_calls_total", command=command)
+    t0 = time.monotonic()
+    try:
+        if _runner is not None:
+            return _runner(cmd, env, timeout)
+        return run_subprocess(cmd, env, timeout, warn_on_failure)
+    finally:
+        get_metrics().observe("pr_status_subprocess_seconds", time.monotonic() - t0, command=command)
+
+
+def run_subprocess(
+    cmd: list[str],
+    env: Optional[dict] = None,
+    timeout: int = 30,
+    warn_on_failure: Optional[str] = None,
+) -> Optional[str]:
     try:
         merged_env = {**os.environ, **(env or {})}
         r = subprocess.run(
@@ -37,10 +74,58 @@ def run(
         return None
 
 
-def gh_graphql(query: str, git_dir: Optional[str] = None) -> Optional[dict]:
-    """Run a GraphQL query via gh api."""
+def gh_cli(cmd: list[str], resource: str = "core", **kwargs: Any) -> Optional[str]:
+    """`run` for a gh command that calls the API, paced by the governor."""
+    try:
+        with get_governor().slot(resource):
+            return run(cmd, **kwargs)
+    except RateLimited:
+        return None
+
+
+def gh_graphql(
+    query: str,
+    git_dir: Optional[str] = None,
+    variables: Optional[dict] = None,
+) -> Optional[dict]:
+    """Run a GraphQL query."""
+    data = _graphql(query, git_dir, variables)
+    rate_limit = ((data or {}).get("data") or {}).get("rateLimit")
+    if isinstance(rate_limit, dict):
+        get_governor().observe_graphql(rate_limit)
+    return data
+
+
+def _graphql(
+    query: str,
+    git_dir: Optional[str] = None,
+    variables: Optional[dict] = None,
+) -> Optional[dict]:
+    transport = get_transport()
+    if transport:
+        return transport.graphql(query, variables)
+
     env = {"GIT_DIR": git_dir} if git_dir else {}
-    result = run(["gh", "api", "graphql", "-f", f"query={query}"], env=env, timeout=30)
+    cmd = ["gh", "api", "graphql", "-f", f"query={query}"]
+    for k, v in (variables or {}).items():
+        cmd += ["-f", f"{k}={v}"] if isinstance(v, str) else ["-F", f"{k}={json.dumps(v)}"]
+    result = gh_cli(cmd, "graphql", env=env, timeout=30)
+    if result:
+        try:
+            data = json.loads(result)
+        except json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
+    return None
+
+
+def gh_rest(path: str) -> Optional[Any]:
+    """GET a REST API path (e.g. "repos/owner/name"); parsed JSON or None."""
+    transport = get_transport()
+    if transport:
+        return transport.rest(path)
+
+    result = gh_cli(["gh", "api", path], timeout=30)
     if result:
         try:
             return json.loads(result)
@@ -0,0 +1,155 @@
+"""Local GitHub webhook receiver for push-based updates in --watch / --daemon.
+
+    PR_STATUS_WEBHOOK_SECRET=... pr-status --watch --webhook 8787
+
+listens on 127.0.0.1:8787 for webhook deliveries (forwarded with e.g.
+`gh webhook forward --events=... --url=http://127.0.0.1:8787`). Each delivery
+must carry a valid X-Hub-Signature-256 for the shared secret.
+
+Events are not patched into PRs field by field: a single check suite or
+review doesn't say what the aggregate CI state or review decision became.
+Instead each event names the PRs and repos it touched, and the poller
+refreshes the ones it tracks right away through the usual enrichment path.
+Events that can bring in a PR we don't track yet (opened, review requested)
+trigger an incremental discovery.
+With deliveries arriving, the regular polling intervals are stretched by
+WEBHOOK_SLOWDOWN and only serve as reconciliation; after WEBHOOK_QUIET
+seconds without one (the forwarder may be down) polling is back to normal.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+SECRET_ENV = "PR_STATUS_WEBHOOK_SECRET"
+WEBHOOK_SLOWDOWN = 10
+WEBHOOK_QUIET = 30 * 60
+MAX_BODY_BYTES = 25 * 1024 * 1024  # GitHub caps payloads at 25 MB
+
+# pull_request actions that can make a PR ours
+DISCOVER_ACTIONS = ("opened", "reopened", "ready_for_review", "review_requested")
+
+EVENTS = ("pull_request", "pull_request_review", "issue_comment", "check_suite", "status", "deployment")
+
+
+@dataclass(frozen=True)
+class Touch:
+    """What a delivery says may have changed."""
+    repo: str
+    numbers: tuple = ()  # PR numbers
+    all_open: bool = False  # every open PR in the repo (commit statuses name no PR)
+    deploys: bool = False  # the repo's deploy state
+    discover: bool = False  # may concern a PR we don't track yet
+
+
+def verify_signature(secret: bytes, body: bytes, header: str) -> bool:
+    expected = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, header or "")
+
+
+def touched(event: str, payload: dict) -> Optional[Touch]:
+    """Map a webhook delivery to the PRs/repos it affects. None to ignore it."""
+    repo = (payload.get("repository") or {}).get("full_name")
+    if not repo or event not in EVENTS:
+        return None
+
+    if event in ("pull_request", "pull_request_review"):
+        pr = payload.get("pull_request") or {}
+        if "number" not in pr:
+            return None
+        action = payload.get("action") if event == "pull_request" else None
+        return Touch(
+            repo, (pr["number"],),
+            deploys=action == "closed" and bool(pr.get("merged")),
+            discover=action in DISCOVER_ACTIONS,
+        )
+    if event == "issue_comment":
+        issue = payload.get("issue") or {}
+        if "pull_request" not in issue:
+            return None  # a comment on a plain issue
+        return Touch(repo, (issue["number"],))
+    if event == "check_suite":
+        prs = (payload.get("check_suite") or {}).get("pull_requests") or []
+        numbers = tuple(pr["number"] for pr in prs if "number" in pr)
+        # Suites from forks list no PRs
+        return Touch(repo, numbers, all_open=not numbers)
+    if event == "status":
+        # Deploy markers are commit statuses too
+        return Touch(repo, all_open=True, deploys=True)
+    return Touch(repo, deploys=True)  # deployment
+
+
+class WebhookReceiver:
+    """Accepts signed deliveries on localhost and queues what they touched."""
+
+    def __init__(self, secret: bytes, port: int, host: str = "127.0.0.1") -> None:
+        self.secret = secret
+        self.wake = threading.Event()  # set on every accepted delivery
+        self.last_delivery: Optional[float] = None  # monotonic time of the last signed one
+        self._touches: list[Touch] = []
+        self._lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    return self._reply(400)
+                if length < 0:
+                    return self._reply(400)
+                if length > MAX_BODY_BYTES:
+                    return self._reply(413)
+                body = self.rfile.read(length)
+                if not verify_signature(receiver.secret, body, self.headers.get("X-Hub-Signature-256", "")):
+                    return self._reply(401)
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    return self._reply(400)
+                receiver.deliver(self.headers.get("X-GitHub-Event", ""), payload)
+                self._reply(202)
+
+            def _reply(self, status: int) -> None:
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+    def deliver(self, event: str, payload: dict) -> None:
+        self.last_delivery = time.monotonic()
+        touch = touched(event, payload) if isinstance(payload, dict) else None
+        if touch:
+            with self._lock:
+                self._touches.append(touch)
+            self.wake.set()
+
+    def active(self, quiet: float = WEBHOOK_QUIET) -> bool:
+        """Whether a delivery arrived within the last `quiet` seconds."""
+        return self.last_delivery is not None and time.monotonic() - self.last_delivery < quiet
+
+    def drain(self) -> list[Touch]:
+        self.wake.clear()
+        with self._lock:
+            touches, self._touches = self._touches, []
+        return touches
+
+    def start(self) -> None:
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()